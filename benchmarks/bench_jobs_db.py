@@ -0,0 +1,177 @@
+"""Benchmarks for jobs_db.py. Run from the project directory: python -m benchmarks.bench_jobs_db"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import jobs_db
+import jobs_excel
+import jobs_filtering
+
+
+def make_jobs(amount, link_amt=3, qualification_amt=4):
+    """Makes synthetic jobs shaped like the ones stored in the database.
+
+    Keyword arguments:
+    amount -- Amount of jobs to make
+    link_amt -- Amount of links each job has
+    qualification_amt -- Amount of qualifications each job has
+
+    Returns:
+    Generator of job tuples
+    """
+
+    for i in range(amount):
+        yield (f"job{i:08}", f"Software Developer {i % 50}", f"Company {i % 1000}", f"City {i % 300}, MA",
+               f"Description of job {i}. " * 5, "3 days ago", f"{60 + i % 90}K - {100 + i % 90}K a year",
+               bool(i % 4 == 0), [f"https://example.com/{i}/{n}" for n in range(link_amt)],
+               [f"Qualification {n}" for n in range(qualification_amt)])
+
+
+def bench_insert(jobs, bulk):
+    """Inserts jobs into an empty database file and times it.
+
+    Keyword arguments:
+    jobs -- Iterable of job tuples
+    bulk -- Use insert_jobs_bulk() instead of one insert_into_db() per job
+
+    Returns:
+    Seconds taken
+    """
+
+    directory = tempfile.TemporaryDirectory()
+    connection, cursor = jobs_db.open_db(os.path.join(directory.name, "bench.sqlite"))
+    jobs_db.setup_db(cursor)
+
+    start = time.perf_counter()
+    if bulk:
+        jobs_db.insert_jobs_bulk(cursor, jobs)
+    else:
+        for j in jobs:
+            jobs_db.insert_into_db(cursor, j)
+        connection.commit()
+    elapsed = time.perf_counter() - start
+
+    jobs_db.close_db(connection)
+    directory.cleanup()
+    return elapsed
+
+
+# jobs_db.get_jobs() before it stopped joining every link to every qualification
+OLD_GET_JOBS_SQL = """
+    SELECT jobs.*,
+    GROUP_CONCAT(related_links.url, '\n') AS related_links,
+    GROUP_CONCAT(qualifications.qualification, '\nasdfqwerzxcv') AS qualifications
+    FROM jobs
+    LEFT JOIN related_links ON jobs.job_id = related_links.job_id
+    LEFT JOIN qualifications ON jobs.job_id = qualifications.job_id
+    GROUP BY jobs.job_id
+"""
+
+
+def bench_get_jobs(amount):
+    """Compares the old joined query of jobs with jobs_db.get_jobs() on jobs with 10 links and 15 qualifications.
+    Prints rows each query goes through, SQLite virtual machine steps and time taken.
+
+    Keyword arguments:
+    amount -- Amount of jobs in the database
+
+    Returns:
+    None
+    """
+
+    connection, cursor = jobs_db.open_db(":memory:")
+    jobs_db.setup_db(cursor)
+    jobs_db.insert_jobs_bulk(cursor, make_jobs(amount, 10, 15))
+
+    cursor.execute("""SELECT COUNT(*) FROM jobs
+                      LEFT JOIN related_links ON jobs.job_id = related_links.job_id
+                      LEFT JOIN qualifications ON jobs.job_id = qualifications.job_id""")
+    old_rows = cursor.fetchone()[0]
+    cursor.execute("SELECT (SELECT COUNT(*) FROM jobs) + (SELECT COUNT(*) FROM related_links) + "
+                   "(SELECT COUNT(*) FROM qualifications)")
+    new_rows = cursor.fetchone()[0]
+
+    steps = [0]
+
+    def count_steps():
+        steps[0] += 1000
+        return 0
+
+    connection.set_progress_handler(count_steps, 1000)
+
+    def run(name, rows, read):
+        steps[0] = 0
+        start = time.perf_counter()
+        read()
+        elapsed = time.perf_counter() - start
+        print(f"  {name}: {rows:>10} rows, {steps[0]:>12} VM steps, {elapsed:6.2f} s")
+
+    print(f"Reading {amount} jobs (10 links, 15 qualifications each)")
+    run("old joined query", old_rows, lambda: cursor.execute(OLD_GET_JOBS_SQL).fetchall())
+    run("get_jobs()      ", new_rows, lambda: jobs_db.get_jobs(cursor))
+
+    connection.set_progress_handler(None, 0)
+    jobs_db.close_db(connection)
+
+
+def bench_search(amount):
+    """Times keyword searches with the full-text index against the in-memory keyword filter.
+
+    Keyword arguments:
+    amount -- Amount of jobs in the database
+
+    Returns:
+    None
+    """
+
+    connection, cursor = jobs_db.open_db(":memory:")
+    jobs_db.setup_db(cursor)
+    start = time.perf_counter()
+    jobs_db.insert_jobs_bulk(cursor, make_jobs(amount))
+    print(f"Searching {amount} jobs (stored and indexed in {time.perf_counter() - start:.1f} s)")
+    jobs = jobs_db.get_jobs(cursor)
+
+    for keyword in ["job 12345.", "company 999", "qualification 3", "ab"]:
+        start = time.perf_counter()
+        found = len(jobs_db.get_filtered_job_ids(cursor, False, 0, keyword, ""))
+        indexed_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        jobs_filtering.filter_keyword(jobs, keyword)
+        memory_ms = (time.perf_counter() - start) * 1000
+        print(f"  {keyword!r:<18} {found:>8} found  full-text index {indexed_ms:9.1f} ms  in memory {memory_ms:9.1f} ms")
+
+    jobs_db.close_db(connection)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=1_000_000, help="amount of synthetic jobs for the bulk insert")
+    parser.add_argument("--read-jobs", type=int, default=100_000, help="amount of jobs in the database when reading")
+    parser.add_argument("--search-jobs", type=int, default=1_000_000, help="amount of jobs in the database when searching")
+    parser.add_argument("--per-row-jobs", type=int, default=100_000,
+                        help="amount of synthetic jobs for the per-row insert (it's much slower)")
+    args = parser.parse_args()
+
+    excel_jobs = jobs_excel.get_jobs("Sprint3Data.xlsx")
+    print(f"Sprint3Data.xlsx ({len(excel_jobs)} rows)")
+    print(f"  per-row insert: {bench_insert(excel_jobs, False) * 1000:8.1f} ms")
+    print(f"  bulk insert:    {bench_insert(excel_jobs, True) * 1000:8.1f} ms")
+
+    synthetic_jobs = list(make_jobs(args.per_row_jobs))
+    print(f"{args.per_row_jobs} synthetic jobs")
+    print(f"  per-row insert: {bench_insert(synthetic_jobs, False):8.2f} s")
+    print(f"  bulk insert:    {bench_insert(synthetic_jobs, True):8.2f} s")
+    del synthetic_jobs
+
+    print(f"{args.jobs} synthetic jobs (generated while inserting)")
+    print(f"  bulk insert:    {bench_insert(make_jobs(args.jobs), True):8.2f} s")
+
+    bench_get_jobs(args.read_jobs)
+    bench_search(args.search_jobs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmarks for jobs_excel.py. Run from the project directory: python -m benchmarks.bench_jobs_excel
+
+Each way of reading runs in its own process so its peak memory (RSS) is measured on its own.
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from openpyxl import Workbook, load_workbook
+
+import jobs_db
+import jobs_excel
+
+
+HEADER = ["Company Name", "Posting Age", "Job ID", "Country", "Location", "Publication Date", "Salary Max",
+          "Salary Min", "Salary Type", "Job Title"]
+
+
+def make_workbook(filename, amount):
+    """Writes a workbook shaped like Sprint3Data.xlsx with synthetic rows.
+
+    Keyword arguments:
+    filename -- xlsx file to write
+    amount -- Amount of rows of jobs
+
+    Returns:
+    None
+    """
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(HEADER)
+    for i in range(amount):
+        sheet.append([f"Company {i % 1000}", f"{i % 30} days ago", f"{i:016x}", "US", f"City {i % 300}, OH",
+                      "2024-03-01", 80000 + i % 50000, 60000 + i % 50000, "yearly", f"Software Developer {i % 50}"])
+    workbook.save(filename)
+
+
+def read_full_workbook(filename):
+    """jobs_excel.get_jobs() before it streamed rows: whole workbook loaded and the list copied on every row."""
+    sheet = load_workbook(filename=filename).active
+    jobs = []
+    for row in sheet.iter_rows(min_row=2, values_only=True):
+        jobs += [jobs_excel.get_job_from_row(row)]
+    return jobs
+
+
+def run(method, filename):
+    """Reads the workbook one way and prints time taken and peak RSS of this process."""
+    start = time.perf_counter()
+    if method == "full":
+        jobs = read_full_workbook(filename)
+        amount = len(jobs)
+    elif method == "stream":
+        amount = sum(1 for _ in jobs_excel.iter_jobs(filename))
+    else:  # stream into the database
+        connection, cursor = jobs_db.open_db(":memory:")
+        jobs_db.setup_db(cursor)
+        amount = sum(jobs_db.insert_jobs_bulk(cursor, jobs_excel.iter_jobs(filename)))
+    elapsed = time.perf_counter() - start
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+    print(f"  {method:<15} {elapsed:7.2f} s  peak RSS {peak_mb:8.1f} MB  ({amount} rows)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000, help="amount of rows in the generated workbook")
+    parser.add_argument("--run", choices=["full", "stream", "stream-to-db"], help=argparse.SUPPRESS)
+    parser.add_argument("--file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run(args.run, args.file)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "jobs.xlsx")
+        print(f"Writing {args.rows} row workbook...")
+        make_workbook(filename, args.rows)
+
+        for method in ["full", "stream", "stream-to-db"]:
+            subprocess.run([sys.executable, "-m", "benchmarks.bench_jobs_excel", "--run", method, "--file", filename],
+                           check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Benchmarks for jobs_filtering.py. Run from the project directory: python -m benchmarks.bench_jobs_filtering
+
+Compares the filter chain MainWindow used to run (one list per filter) with the single pass in memory and the single
+query over the database.
+"""
+
+import argparse
+import time
+
+import jobs_db
+import jobs_filtering
+from benchmarks.bench_jobs_db import make_jobs
+
+
+# (remote_checked, user_min_salary, keyword, user_city)
+FILTERS = [
+    (False, 0, "", ""),
+    (True, 0, "", ""),
+    (False, 120_000, "", ""),
+    (False, 0, "developer 7", ""),
+    (True, 80_000, "developer", "City 12, MA"),
+]
+
+
+def filter_chain(jobs, remote_checked, user_min_salary, keyword, user_city):
+    """How MainWindow.filter_jobs() filtered before the single pass."""
+    jobs = jobs_filtering.filter_remote(jobs, remote_checked)
+    jobs = jobs_filtering.filter_min_salary(jobs, user_min_salary)
+    jobs = jobs_filtering.filter_keyword(jobs, keyword)
+    return jobs_filtering.filter_city_location(jobs, user_city)
+
+
+def time_ms(function):
+    start = time.perf_counter()
+    result = function()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def bench_filters(amount):
+    """Times each set of filters with each way of filtering.
+
+    Keyword arguments:
+    amount -- Amount of jobs to filter
+
+    Returns:
+    None
+    """
+
+    connection, cursor = jobs_db.open_db(":memory:")
+    jobs_db.setup_db(cursor)
+    jobs_db.insert_jobs_bulk(cursor, make_jobs(amount, 2, 2))
+    jobs = jobs_db.get_jobs(cursor)
+    corpus = jobs_filtering.build_search_corpus(jobs)
+
+    print(f"{amount} jobs")
+    print(f"  {'filters':<48} {'chain':>10} {'single pass':>12} {'sql':>10} {'found':>8}")
+    for filters in FILTERS:
+        chain_ms, expected = time_ms(lambda: filter_chain(jobs, *filters))
+        single_ms, found = time_ms(lambda: jobs_filtering.filter_jobs(jobs, *filters, corpus))
+        sql_ms, job_ids = time_ms(lambda: jobs_db.get_filtered_job_ids(cursor, *filters))
+        assert found == expected and job_ids == [j[0] for j in expected]
+        print(f"  {str(filters):<48} {chain_ms:8.1f}ms {single_ms:10.1f}ms {sql_ms:8.1f}ms {len(found):>8}")
+
+    jobs_db.close_db(connection)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma separated amounts of jobs")
+    args = parser.parse_args()
+
+    for amount in args.sizes.split(","):
+        bench_filters(int(amount))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Benchmarks for jobs_geocoding.py. Run from the project directory: python -m benchmarks.bench_jobs_geocoding
+
+Times loading the bundled gazetteer and looking up the Excel file's job locations in it.
+"""
+
+import argparse
+import time
+
+import jobs_excel
+import jobs_filtering
+import jobs_geocoding
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=100, help="times to look up every location")
+    args = parser.parse_args()
+
+    geocoder = jobs_geocoding.GazetteerGeocoder()
+    start = time.perf_counter()
+    geocoder.load()
+    print(f"Loading gazetteer: {(time.perf_counter() - start) * 1000:8.1f}ms "
+          f"({len(geocoder.zip_rows)} ZIP codes, {len(geocoder.city_rows)} cities)")
+
+    locations = [jobs_filtering.remove_parenthesis_in_location(j[3]) for j in jobs_excel.get_jobs("Sprint3Data.xlsx")]
+    found = sum(1 for location in locations if geocoder.geocode(location))
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for location in locations:
+            geocoder.geocode(location)
+    seconds = time.perf_counter() - start
+    print(f"Looking up {len(locations)} job locations ({found} found): "
+          f"{seconds / (args.repeat * len(locations)) * 1_000_000:6.2f}us per location")
+
+
+if __name__ == "__main__":
+    main()
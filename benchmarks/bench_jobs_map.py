@@ -0,0 +1,66 @@
+"""Benchmarks for jobs_map.py. Run from the project directory: python -m benchmarks.bench_jobs_map
+
+Times working out and encoding the markers sent to the map page when filters change, compared to rendering the
+whole page with folium as the map did before.
+"""
+
+import argparse
+import io
+import random
+import time
+
+import folium
+from folium.plugins import MarkerCluster
+import jobs_map
+
+
+def make_markers(count, seed=0):
+    """Makes markers of jobs spread over the USA.
+
+    Keyword arguments:
+    count -- Amount of markers
+    seed -- Seed of the random coordinates
+
+    Returns:
+    dict of job id to (latitude, longitude, popup)
+    """
+
+    rng = random.Random(seed)
+    return {f"job{i}": (rng.uniform(25, 49), rng.uniform(-124, -67), jobs_map.get_popup(f"Engineer {i}", "Company"))
+            for i in range(count)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--markers", type=int, default=10_000, help="markers shown before filtering")
+    args = parser.parse_args()
+
+    shown = make_markers(args.markers)
+    # Filtering keeps every other job
+    filtered = dict(list(shown.items())[::2])
+
+    start = time.perf_counter()
+    added, removed = jobs_map.get_marker_delta(shown, filtered)
+    script = jobs_map.get_update_script(added, removed)
+    print(f"Delta {args.markers} -> {len(filtered)} markers: {(time.perf_counter() - start) * 1000:8.1f}ms "
+          f"({len(script) / 1000:.0f}KB script)")
+
+    start = time.perf_counter()
+    added, removed = jobs_map.get_marker_delta(filtered, shown)
+    script = jobs_map.get_update_script(added, removed)
+    print(f"Delta {len(filtered)} -> {args.markers} markers: {(time.perf_counter() - start) * 1000:8.1f}ms "
+          f"({len(script) / 1000:.0f}KB script)")
+
+    start = time.perf_counter()
+    folium_map = folium.Map(zoom_start=4, location=(39.828175, -98.5795))
+    cluster = MarkerCluster().add_to(folium_map)
+    for latitude, longitude, popup in filtered.values():
+        folium.Marker(location=[latitude, longitude], popup=popup).add_to(cluster)
+    page = io.BytesIO()
+    folium_map.save(page, close_file=False)
+    print(f"Rendering page with {len(filtered)} markers: {(time.perf_counter() - start) * 1000:8.1f}ms "
+          f"({len(page.getvalue()) / 1000:.0f}KB page)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmarks for jobs_records.py. Run from the project directory: python -m benchmarks.bench_jobs_records
+
+Measures memory held by jobs kept as lists (how jobs_db.get_jobs() returns them) and as JobRecord, and how long
+filtering takes with each.
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+import jobs_filtering
+import jobs_records
+from benchmarks.bench_jobs_db import make_jobs
+
+
+def as_lists(jobs):
+    """Jobs as jobs_db.get_jobs() returns them: a list per job with lists of links and qualifications."""
+    return [list(j[:8]) + [list(j[8]), list(j[9])] for j in jobs]
+
+
+def as_records(jobs):
+    return list(jobs_records.from_jobs(jobs))
+
+
+def measure(amount, build):
+    """Builds jobs one way and measures the memory they hold and how long filtering them takes.
+
+    Keyword arguments:
+    amount -- Amount of jobs
+    build -- Function turning a generator of job tuples into the jobs to measure
+
+    Returns:
+    (megabytes, filter_seconds)
+    """
+
+    gc.collect()
+    tracemalloc.start()
+    jobs = build(make_jobs(amount, 3, 4))
+    gc.collect()
+    megabytes = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+    tracemalloc.stop()
+
+    corpus = jobs_filtering.build_search_corpus(jobs)
+    # Best of a few runs, since a single run is easily thrown off
+    filter_seconds = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        jobs_filtering.filter_jobs(jobs, True, 80_000, "developer", "City 12, MA", corpus)
+        filter_seconds = min(filter_seconds, time.perf_counter() - start)
+    return megabytes, filter_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=1_000_000, help="amount of synthetic jobs")
+    args = parser.parse_args()
+
+    print(f"{args.jobs} jobs")
+    for name, build in [("lists", as_lists), ("JobRecord", as_records)]:
+        megabytes, filter_seconds = measure(args.jobs, build)
+        print(f"  {name:<10} {megabytes:9.1f} MB held  filtering {filter_seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
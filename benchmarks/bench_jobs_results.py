@@ -0,0 +1,144 @@
+"""Benchmarks for jobs_results.py. Run from the project directory: python -m benchmarks.bench_jobs_results
+
+Compares how fast salaries are found in synthetic job descriptions by the salary search jobs_results used to have
+and by jobs_results.extract_salary(). Then times jobs_results.prepare_jobs_for_db() in one process and in a process
+pool at different amounts of jobs, to show where the pool starts paying off (PARALLEL_PREPARE_MIN_JOBS).
+"""
+
+import argparse
+import os
+import random
+import re
+import time
+
+import jobs_results
+
+
+FILLER = ["We are looking for a motivated engineer to join our team.", "You will work with 3 other developers.",
+          "Requires 5 years of experience with Python and SQL.", "Founded in 2010, we have 300 employees.",
+          "Benefits include 401k matching and 15 days of paid time off.", "This role is hybrid, 2 days a week."]
+SALARY_PHRASES = ["The salary range for this role is {low},000 - {high},000.", "Pay: ${low}K–${high}K",
+                  "Pay range: {hourly} - {hourly_high} per hour", "Compensation: ${low},000 per year", ""]
+BENEFITS = [["Health insurance", "Dental insurance"], ["401(k)", "${hourly}-${hourly_high} an hour"],
+            ["{low},000 - {high},000", "Paid time off"], []]
+
+
+def make_postings(amount, filler_amt):
+    """Makes (benefits, description) pairs with salaries in the formats seen in Serpapi data, or none at all."""
+    random.seed(0)
+    postings = []
+    for _ in range(amount):
+        low = random.randint(40, 150)
+        hourly = random.randint(15, 90)
+        values = {"low": low, "high": low + random.randint(0, 40), "hourly": hourly, "hourly_high": hourly + 10}
+        sentences = random.choices(FILLER, k=filler_amt)
+        sentences.insert(random.randint(0, filler_amt), random.choice(SALARY_PHRASES).format(**values))
+        benefits = [b.format(**values) for b in random.choice(BENEFITS)]
+        postings.append((benefits, " ".join(sentences)))
+    return postings
+
+
+def make_serpapi_jobs(amount):
+    """Makes job dictionaries shaped like Serpapi's Google Jobs results, without salaries in detected_extensions."""
+    return [{"job_id": f" job {i} ", "title": " Software Developer ", "company_name": " Company ",
+             "location": " Boston, MA ", "description": description,
+             "detected_extensions": {"posted_at": "3 days ago"},
+             "job_highlights": [{"title": "Qualifications", "items": [" Python ", " SQL "]},
+                                {"title": "Benefits", "items": benefits}],
+             "related_links": [{"link": f" https://example.com/{i} "}]}
+            for i, (benefits, description) in enumerate(make_postings(amount, 10))]
+
+
+def old_get_salary(benefits, job_description):
+    """How jobs_results.get_salary() searched before extract_salary() replaced it."""
+    min_salary = 0
+    max_salary = 0
+    for item in benefits:
+        if 'range' in item.lower():
+            numbers = re.findall(r'\b\d{1,3}(?:,\d{3})*(?:\.\d+)?(?!\d)', item)
+            if numbers:
+                return float(numbers[0].replace(',', '')), float(numbers[1].replace(',', ''))
+        numbers = re.findall(r'\b\d{1,3}(?:,\d{3})*(?:\.\d+)?(?!\d)', item)
+        if len(numbers) == 2 and int(numbers[0].replace(',', '')) > 30:
+            return float(numbers[0].replace(',', '')), float(numbers[1].replace(',', ''))
+        else:
+            return min_salary, max_salary
+    location = job_description.find("salary range")
+    if location < 0:
+        location = job_description.find("pay range")
+    if location < 0:
+        return min_salary, max_salary
+    numbers = re.findall(r'\b\d{1,3}(?:,\d{3})*(?:\.\d+)?(?!\d)', job_description[location:location + 50])
+    if numbers:
+        return float(numbers[0].replace(',', '')), float(numbers[1].replace(',', ''))
+    return min_salary, max_salary
+
+
+def bench_extract(amount, filler_amt):
+    """Times both salary searches over the same postings.
+
+    Keyword arguments:
+    amount -- Amount of job postings
+    filler_amt -- Amount of sentences in each description besides the salary
+
+    Returns:
+    None
+    """
+
+    postings = make_postings(amount, filler_amt)
+    print(f"{amount} postings, {filler_amt + 1} sentences each")
+
+    for name, function in (("old get_salary", old_get_salary), ("extract_salary", jobs_results.extract_salary)):
+        start = time.perf_counter()
+        found = sum(1 for benefits, description in postings if function(benefits, description) not in (None, (0, 0)))
+        seconds = time.perf_counter() - start
+        print(f"  {name:<16} {seconds:6.2f} s {amount / seconds:>10,.0f} postings/s {found:>8} salaries found")
+
+
+def bench_prepare(amounts, max_workers):
+    """Times preparing jobs for the database in one process and in a process pool.
+
+    Keyword arguments:
+    amounts -- Amounts of jobs to prepare
+    max_workers -- Processes in the pool
+
+    Returns:
+    None
+    """
+
+    print(f"prepare_jobs_for_db, {max_workers} processes")
+    print(f"  {'jobs':>8} {'serial':>10} {'pool':>10}")
+    for amount in amounts:
+        jobs = make_serpapi_jobs(amount)
+        start = time.perf_counter()
+        expected = jobs_results.prepare_jobs_chunk(jobs)
+        serial_ms = (time.perf_counter() - start) * 1000
+
+        # Pool is forced on here, prepare_jobs_for_db() itself skips it below PARALLEL_PREPARE_MIN_JOBS
+        min_jobs = jobs_results.PARALLEL_PREPARE_MIN_JOBS
+        jobs_results.PARALLEL_PREPARE_MIN_JOBS = 0
+        start = time.perf_counter()
+        prepared = jobs_results.prepare_jobs_for_db(jobs, max_workers)
+        pool_ms = (time.perf_counter() - start) * 1000
+        jobs_results.PARALLEL_PREPARE_MIN_JOBS = min_jobs
+
+        assert prepared == expected
+        print(f"  {amount:>8} {serial_ms:8.1f}ms {pool_ms:8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--postings", type=int, default=100_000, help="amount of job postings")
+    parser.add_argument("--sentences", default="5,20", help="comma separated amounts of filler sentences")
+    parser.add_argument("--prepare", default="500,2000,5000,20000,100000",
+                        help="comma separated amounts of jobs to prepare for the database")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes used to prepare jobs")
+    args = parser.parse_args()
+
+    for filler_amt in args.sentences.split(","):
+        bench_extract(args.postings, int(filler_amt))
+    bench_prepare([int(a) for a in args.prepare.split(",")], args.workers)
+
+
+if __name__ == "__main__":
+    main()
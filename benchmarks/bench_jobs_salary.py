@@ -0,0 +1,56 @@
+"""Benchmarks for jobs_salary.py. Run from the project directory: python -m benchmarks.bench_jobs_salary"""
+
+import argparse
+import random
+import time
+
+import jobs_db
+import jobs_filtering
+import jobs_salary
+from benchmarks.bench_jobs_db import make_jobs
+
+
+SALARY_FORMATS = ["{low}K - {high}K", "{low}K-{high}K a year", "{hourly} hourly", "{hourly}–{hourly_high} an hour",
+                  "{low}000 - {high}000 yearly", "${low},000 a year", "{hourly} - -1 hourly", "0", ""]
+
+
+def make_salaries(amount):
+    """Makes salary strings in the formats seen from Serpapi and the Excel file."""
+    random.seed(0)
+    salaries = []
+    for _ in range(amount):
+        low = random.randint(40, 150)
+        hourly = random.randint(15, 90)
+        salaries.append(random.choice(SALARY_FORMATS).format(low=low, high=low + random.randint(0, 40), hourly=hourly,
+                                                             hourly_high=hourly + 10))
+    return salaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--salaries", type=int, default=1_000_000, help="amount of salary strings")
+    parser.add_argument("--jobs", type=int, default=200_000, help="amount of jobs in the database to renormalize")
+    args = parser.parse_args()
+
+    salaries = make_salaries(args.salaries)
+    print(f"{args.salaries} salary strings")
+
+    start = time.perf_counter()
+    [jobs_filtering.get_yearly_salary_range(s) for s in salaries]
+    print(f"  one at a time: {time.perf_counter() - start:6.2f} s")
+
+    start = time.perf_counter()
+    jobs_salary.yearly_salary_arrays(salaries)
+    print(f"  column:        {time.perf_counter() - start:6.2f} s")
+
+    connection, cursor = jobs_db.open_db(":memory:")
+    jobs_db.setup_db(cursor)
+    jobs_db.insert_jobs_bulk(cursor, make_jobs(args.jobs, 0, 0))
+    start = time.perf_counter()
+    jobs_db.renormalize_salaries(cursor)
+    print(f"Renormalizing {args.jobs} stored jobs: {time.perf_counter() - start:6.2f} s")
+    jobs_db.close_db(connection)
+
+
+if __name__ == "__main__":
+    main()
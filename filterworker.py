@@ -0,0 +1,157 @@
+"""Filters jobs for MainWindow in a thread pool so the window stays responsive while filtering."""
+
+import sqlite3
+import threading
+from PySide6.QtCore import QObject, QRunnable, Signal
+import jobs_db
+import jobs_filtering
+
+
+# Jobs checked in memory between checks for whether the filtering was cancelled
+FILTER_CHUNK_SIZE = 10_000
+
+
+class FilterCancelled(Exception):
+    """Raised inside filtering when a newer filter request has replaced it."""
+
+
+def filter_indexes(jobs, corpus, filters, broader=None, cursor=None, is_cancelled=None):
+    """Gets positions of jobs matching filters.
+    With a database, all filters are one query over its indexes. Without, jobs are filtered in a single pass. If the
+    result of broader filters (like "pyth" before "python") is given, only those jobs are checked. A broader result
+    is narrowed the same way it was found (with the database when there is one), so a result never depends on which
+    filters were applied before it.
+
+    Keyword arguments:
+    jobs -- all jobs from MainWindow object
+    corpus -- search text of each job from jobs_filtering.build_search_corpus(), in the same order as jobs
+    filters -- tuple of (remote_checked, user_min_salary, keyword, user_city)
+    broader -- positions of jobs matching broader filters, found with the same cursor (or also in memory), or None
+    cursor -- cursor of the database the jobs are from, or None to filter only in memory
+    is_cancelled -- function returning True when the filtering should stop, or None to never stop
+
+    Returns:
+    List of positions in jobs of matching jobs, in order
+    """
+
+    # Every job is a candidate, so limiting the query to them wouldn't help
+    if broader is not None and len(broader) >= len(jobs):
+        broader = None
+
+    if cursor is not None:
+        candidate_job_ids = [jobs[i][0] for i in broader] if broader is not None else None
+        job_ids = set(jobs_db.get_filtered_job_ids(cursor, *filters, candidate_job_ids))
+        return [i for i in (broader if broader is not None else range(len(jobs))) if jobs[i][0] in job_ids]
+
+    candidates = broader if broader is not None else range(len(jobs))
+    indexes = []
+    for start in range(0, len(candidates), FILTER_CHUNK_SIZE):
+        if is_cancelled is not None and is_cancelled():
+            raise FilterCancelled
+        indexes += jobs_filtering.filter_job_indexes(jobs, *filters, corpus,
+                                                     candidates[start:start + FILTER_CHUNK_SIZE])
+    return indexes
+
+
+class FilterSignals(QObject):
+    # generation, filters, positions of matching jobs
+    finished = Signal(int, object, object)
+
+
+class FilterWorker(QRunnable):
+    """Filters jobs once in a thread pool and sends the result through signals.finished.
+    SQLite connections can't be shared between threads, so the worker opens its own read only connection to the
+    database file. Without a file, jobs are filtered in memory.
+    A worker can be cancelled from another thread. It then stops at the next chunk of jobs (or interrupts its query)
+    and sends nothing.
+    """
+
+    def __init__(self, generation, jobs, corpus, filters, broader=None, db_filename=None):
+        """Sets up the filtering to run.
+
+        Keyword arguments:
+        generation -- number of the filter request, sent back with the result so old results can be told apart
+        jobs -- all jobs from MainWindow object
+        corpus -- search text of each job, in the same order as jobs
+        filters -- tuple of (remote_checked, user_min_salary, keyword, user_city)
+        broader -- positions of jobs matching broader filters, or None
+        db_filename -- file of the database the jobs are from, or None to filter only in memory
+
+        Returns:
+        None
+        """
+
+        super().__init__()
+        # Python keeps the worker alive while MainWindow holds it, so Qt mustn't delete it after running
+        self.setAutoDelete(False)
+        self.signals = FilterSignals()
+        self.generation = generation
+        self.jobs = jobs
+        self.corpus = corpus
+        self.filters = filters
+        self.broader = broader
+        self.db_filename = db_filename
+        self.cancelled = False
+        self.connection = None
+        self.lock = threading.Lock()
+
+    def cancel(self):
+        """Stops the filtering if it's still running. Can be called from any thread.
+
+        Keyword arguments:
+        None
+
+        Returns:
+        None
+        """
+
+        with self.lock:
+            self.cancelled = True
+            if self.connection is not None:
+                self.connection.interrupt()
+
+    def is_cancelled(self):
+        """Checked by filter_indexes() between chunks of jobs."""
+        return self.cancelled
+
+    def run(self):
+        try:
+            indexes = self.filter()
+        except FilterCancelled:
+            return
+
+        if not self.cancelled:
+            self.signals.finished.emit(self.generation, self.filters, indexes)
+
+    def filter(self):
+        """Filters the jobs, with the worker's own connection to the database if there is one.
+
+        Keyword arguments:
+        None
+
+        Returns:
+        List of positions of matching jobs
+        """
+
+        cursor = None
+        if self.db_filename:
+            with self.lock:
+                if self.cancelled:
+                    raise FilterCancelled
+                try:
+                    self.connection, cursor = jobs_db.open_db(self.db_filename, read_only=True)
+                except sqlite3.Error:
+                    cursor = None
+
+        try:
+            return filter_indexes(self.jobs, self.corpus, self.filters, self.broader, cursor, self.is_cancelled)
+        except sqlite3.Error:
+            if self.cancelled:
+                raise FilterCancelled
+            # Database couldn't be searched, so search every job in memory instead
+            return filter_indexes(self.jobs, self.corpus, self.filters, None, None, self.is_cancelled)
+        finally:
+            with self.lock:
+                if self.connection is not None:
+                    self.connection.close()
+                    self.connection = None
@@ -0,0 +1,79 @@
+"""Geocodes job locations for MapWindow in the background, so the map shows known locations right away."""
+
+import threading
+from PySide6.QtCore import QObject, QRunnable, Signal
+import jobs_geocoding
+
+
+class GeocodeSignals(QObject):
+    # generation, location, (latitude, longitude) or None
+    located = Signal(int, str, object)
+    # generation, locations done, locations in total
+    progress = Signal(int, int, int)
+    # generation
+    finished = Signal(int)
+
+
+class GeocodeWorker(QRunnable):
+    """Geocodes locations one at a time in a thread pool, sending each result through signals.located as soon as
+    it's known. Requests to the geocoder wait on a rate limiter shared by every worker, so the limit holds when a new
+    worker replaces one that was cancelled. The worker opens its own connection to the geocode cache file, since SQLite
+    connections can't be shared between threads.
+    A worker can be cancelled from another thread. It then stops before the next location, without waiting out the
+    rate limit, and sends no more signals.
+    """
+
+    def __init__(self, generation, locations, geocoder, cache_filename=None, rate_limiter=None):
+        """Sets up the geocoding to run.
+
+        Keyword arguments:
+        generation -- number of the geocoding request, sent with results so old results can be told apart
+        locations -- location strings, each only once
+        geocoder -- geopy geocoder, such as Nominatim
+        cache_filename -- file of the jobs_geocoding.GeocodeCache to use, or None for no cache
+        rate_limiter -- jobs_geocoding.RateLimiter for requests to the geocoder, or None to not limit them
+
+        Returns:
+        None
+        """
+
+        super().__init__()
+        # Python keeps the worker alive while MapWindow holds it, so Qt mustn't delete it after running
+        self.setAutoDelete(False)
+        self.signals = GeocodeSignals()
+        self.generation = generation
+        self.locations = locations
+        self.geocoder = geocoder
+        self.cache_filename = cache_filename
+        self.rate_limiter = rate_limiter
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        """Stops the geocoding if it's still running. Can be called from any thread.
+
+        Keyword arguments:
+        None
+
+        Returns:
+        None
+        """
+
+        self.cancelled.set()
+
+    def run(self):
+        cache = jobs_geocoding.GeocodeCache(self.cache_filename) if self.cache_filename else None
+        try:
+            # Waiting on the cancelled event lets cancel() end a wait on the rate limiter early
+            results = jobs_geocoding.geocode_locations(self.locations, self.geocoder, cache, self.rate_limiter,
+                                                       self.cancelled)
+            for done, (location, coordinates) in enumerate(results, 1):
+                if self.cancelled.is_set():
+                    return
+                self.signals.located.emit(self.generation, location, coordinates)
+                self.signals.progress.emit(self.generation, done, len(self.locations))
+        finally:
+            if cache is not None:
+                cache.close()
+
+        if not self.cancelled.is_set():
+            self.signals.finished.emit(self.generation)
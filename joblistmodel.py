@@ -0,0 +1,88 @@
+"""Model of the job list in MainWindow. Rows are only turned into text when the view draws them."""
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt
+
+
+class JobListModel(QAbstractListModel):
+    """List model over positions of jobs, such as the result of filtering them.
+    Filtering swaps the positions in one reset rather than making an item for every job, and the view only asks for
+    the text of the rows it shows.
+    """
+
+    def __init__(self, jobs=(), parent=None):
+        """Sets up the model listing all jobs.
+
+        Keyword arguments:
+        jobs -- Sequence of jobs
+        parent -- Parent QObject
+
+        Returns:
+        None
+        """
+
+        super().__init__(parent)
+        self.jobs = jobs
+        self.indexes = range(len(jobs))
+
+    def set_jobs(self, jobs):
+        """Replaces the jobs of the model and lists all of them.
+
+        Keyword arguments:
+        jobs -- Sequence of jobs
+
+        Returns:
+        None
+        """
+
+        self.beginResetModel()
+        self.jobs = jobs
+        self.indexes = range(len(jobs))
+        self.endResetModel()
+
+    def set_indexes(self, indexes):
+        """Lists only the jobs at the given positions.
+
+        Keyword arguments:
+        indexes -- Sequence of positions in jobs, in the order to list them
+
+        Returns:
+        None
+        """
+
+        self.beginResetModel()
+        self.indexes = indexes
+        self.endResetModel()
+
+    def get_job(self, row):
+        """Gets the job listed at a row.
+
+        Keyword arguments:
+        row -- Row of the list
+
+        Returns:
+        Job data
+        """
+
+        return self.jobs[self.indexes[row]]
+
+    def get_jobs(self):
+        """Gets every listed job, in the order they're listed.
+
+        Keyword arguments:
+        None
+
+        Returns:
+        List of jobs
+        """
+
+        return [self.jobs[i] for i in self.indexes]
+
+    def rowCount(self, parent=QModelIndex()):
+        # Only the invisible root has rows in a list
+        return 0 if parent.isValid() else len(self.indexes)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        job = self.get_job(index.row())
+        return f"{job[1]}\n{job[2]}"  # Title and company
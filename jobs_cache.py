@@ -0,0 +1,145 @@
+"""Module for caching Serpapi responses on disk so repeated requests don't use up quota or wait on the network."""
+
+import hashlib
+import json
+import sqlite3
+import time
+
+
+class CacheMissError(LookupError):
+    """Raised when a response isn't cached and the cache is only allowed to serve cached responses."""
+
+
+class ResponseCache:
+    """SQLite store of Serpapi responses keyed by their request parameters (excluding the api key).
+    Responses older than the TTL are treated as missing. When the stored responses get bigger than the size limit,
+    the least recently used ones are removed first.
+    """
+
+    def __init__(self, filename, ttl=24 * 60 * 60, max_bytes=50 * 1024 * 1024, cache_only=False):
+        """Opens (and creates if needed) the cache file.
+
+        Keyword arguments:
+        filename -- SQLite file to store responses in
+        ttl -- Seconds a response stays valid. None keeps responses forever.
+        max_bytes -- Most bytes of responses to keep stored
+        cache_only -- Only serve responses from the cache and never make requests
+
+        Returns:
+        None
+        """
+
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.cache_only = cache_only
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute('''CREATE TABLE IF NOT EXISTS responses (
+        cache_key TEXT PRIMARY KEY,
+        params TEXT NOT NULL,
+        response TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        accessed_at REAL NOT NULL
+        );''')
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses (accessed_at);")
+        self.connection.commit()
+
+    @staticmethod
+    def get_key(params):
+        """Makes the key a request is stored under. The api key isn't part of it so changing keys keeps the cache.
+
+        Keyword arguments:
+        params -- Serpapi request parameters
+
+        Returns:
+        Hex digest of the request parameters
+        """
+
+        params = {k: v for k, v in params.items() if k != "api_key"}
+        return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, params):
+        """Gets the cached response of a request.
+
+        Keyword arguments:
+        params -- Serpapi request parameters
+
+        Returns:
+        The cached response, or None if it isn't cached or has expired
+        """
+
+        key = self.get_key(params)
+        row = self.connection.execute("SELECT response, created_at FROM responses WHERE cache_key = ?;",
+                                      (key,)).fetchone()
+        if row is None:
+            return None
+
+        now = time.time()
+        if self.ttl is not None and now - row[1] > self.ttl:
+            self.connection.execute("DELETE FROM responses WHERE cache_key = ?;", (key,))
+            self.connection.commit()
+            return None
+
+        self.connection.execute("UPDATE responses SET accessed_at = ? WHERE cache_key = ?;", (now, key))
+        self.connection.commit()
+        return json.loads(row[0])
+
+    def put(self, params, response):
+        """Stores the response of a request and evicts old responses if the cache is over its size limit.
+
+        Keyword arguments:
+        params -- Serpapi request parameters
+        response -- JSON serializable response of the request
+
+        Returns:
+        None
+        """
+
+        params_str = json.dumps({k: v for k, v in params.items() if k != "api_key"}, sort_keys=True, default=str)
+        response_str = json.dumps(response)
+        now = time.time()
+
+        self.connection.execute('''INSERT OR REPLACE INTO responses
+                                   (cache_key, params, response, size, created_at, accessed_at)
+                                   VALUES (?, ?, ?, ?, ?, ?);''',
+                                (self.get_key(params), params_str, response_str, len(response_str), now, now))
+        self.evict()
+        self.connection.commit()
+
+    def evict(self):
+        """Removes expired responses, then the least recently used responses until the cache fits its size limit.
+
+        Keyword arguments:
+        None
+
+        Returns:
+        None
+        """
+
+        if self.ttl is not None:
+            self.connection.execute("DELETE FROM responses WHERE created_at < ?;", (time.time() - self.ttl,))
+
+        total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses;").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        removed = []
+        for key, size in self.connection.execute("SELECT cache_key, size FROM responses ORDER BY accessed_at;"):
+            if total <= self.max_bytes:
+                break
+            removed.append((key,))
+            total -= size
+        self.connection.executemany("DELETE FROM responses WHERE cache_key = ?;", removed)
+
+    def close(self):
+        """Commits and closes the cache file.
+
+        Keyword arguments:
+        None
+
+        Returns:
+        None
+        """
+
+        self.connection.commit()
+        self.connection.close()
@@ -1,24 +1,90 @@
 """Module for handling database for jobs. Includes creating, updating, and deleting jobs data."""
 
 
+import hashlib
+import json
 import sqlite3
-
-
-def open_db(filename):
+from contextlib import contextmanager
+from itertools import chain, islice
+from pathlib import Path
+import jobs_filtering
+import jobs_geocoding
+import jobs_salary
+
+
+JOB_COLUMNS = ["job_id", "title", "company_name", "location", "description", "posted_at", "salary", "remote"]
+
+# Columns written when storing a job. Besides the job's own data, there's data worked out from it by get_job_row().
+STORED_COLUMNS = JOB_COLUMNS + ["content_hash", "salary_min_yearly", "salary_max_yearly", "city"]
+
+INSERT_JOB_SQL = f'''INSERT OR IGNORE INTO jobs ({", ".join(STORED_COLUMNS)})
+                     VALUES ({", ".join("?" * len(STORED_COLUMNS))});'''
+UPDATE_JOB_SQL = f'''UPDATE OR IGNORE jobs SET {", ".join(f"{c} = ?" for c in STORED_COLUMNS[1:])}
+                     WHERE job_id = ?;'''
+INSERT_LINK_SQL = '''INSERT OR IGNORE INTO related_links (job_id, url)
+                      VALUES (?, ?);'''
+INSERT_QUALIFICATION_SQL = '''INSERT OR IGNORE INTO qualifications (job_id, qualification)
+                               VALUES (?, ?);'''
+
+# SQL giving each readable column of a job. Links and qualifications are gathered into JSON arrays.
+JOB_SELECT_SQL = {c: f"jobs.{c}" for c in JOB_COLUMNS}
+JOB_SELECT_SQL["related_links"] = '''(SELECT json_group_array(url) FROM (
+                                       SELECT url FROM related_links
+                                       WHERE related_links.job_id = jobs.job_id ORDER BY link_id))'''
+JOB_SELECT_SQL["qualifications"] = '''(SELECT json_group_array(qualification) FROM (
+                                        SELECT qualification FROM qualifications
+                                        WHERE qualifications.job_id = jobs.job_id ORDER BY qualification_id))'''
+LIST_COLUMNS = {"related_links", "qualifications"}
+
+# Full-text index rows share their rowid with the job's row in the jobs table
+DELETE_FTS_SQL = "DELETE FROM jobs_fts WHERE rowid = (SELECT rowid FROM jobs WHERE job_id = ?);"
+# Columns of the full-text index: the job's text fields, with its links and qualifications each joined into one
+FTS_COLUMNS = ["job_id", "title", "company_name", "location", "description", "posted_at", "salary", "related_links",
+               "qualifications"]
+INSERT_FTS_SQL = f'''INSERT INTO jobs_fts (rowid, {", ".join(FTS_COLUMNS)})
+                     SELECT rowid, {", ".join(FTS_COLUMNS[:-2])},
+                     (SELECT group_concat(url, char(10)) FROM related_links
+                      WHERE related_links.job_id = jobs.job_id),
+                     (SELECT group_concat(qualification, char(10)) FROM qualifications
+                      WHERE qualifications.job_id = jobs.job_id)
+                     FROM jobs'''
+
+
+def open_db(filename, read_only=False):
     """Open a connection to a(n) SQLite database file and return the database connection and cursor.
 
     Keyword arguments:
     filename -- The name of the database file to connect to
+    read_only -- Open an existing file only for reading, such as a second connection used from another thread
 
     Returns:
     A tuple of the database connection and cursor
     """
 
-    db_connection = sqlite3.connect(filename)
+    if read_only:
+        db_connection = sqlite3.connect(Path(filename).resolve().as_uri() + "?mode=ro", uri=True)
+    else:
+        db_connection = sqlite3.connect(filename)
     cursor = db_connection.cursor()
     return db_connection, cursor
 
 
+def get_db_filename(cursor):
+    """Gets the file of the database a cursor uses, so another connection to it can be opened.
+
+    Keyword arguments:
+    cursor -- Cursor of the database
+
+    Returns:
+    Path of the database file, or None if the database is only in memory
+    """
+
+    for _, name, filename in cursor.connection.execute("PRAGMA database_list;"):
+        if name == "main":
+            return filename or None
+    return None
+
+
 def close_db(connection):
     """Commit any pending transaction to the database and close the connection.
 
@@ -33,6 +99,39 @@ def close_db(connection):
     connection.close()
 
 
+@contextmanager
+def transaction(cursor):
+    """Runs the statements of a with block as one transaction, so either all of them are kept or none are.
+    When the caller already has a transaction open, the block runs in a savepoint inside it instead. Only the block's
+    own changes are then undone if it fails, and the caller's transaction is left for the caller to commit.
+
+    Keyword arguments:
+    cursor -- Used to run the statements
+
+    Returns:
+    Context manager for the with block
+    """
+
+    connection = cursor.connection
+    if connection.in_transaction:
+        cursor.execute("SAVEPOINT jobs_db;")
+        try:
+            yield
+        except BaseException:
+            cursor.execute("ROLLBACK TO jobs_db;")
+            cursor.execute("RELEASE jobs_db;")
+            raise
+        cursor.execute("RELEASE jobs_db;")
+    else:
+        cursor.execute("BEGIN;")
+        try:
+            yield
+        except BaseException:
+            connection.rollback()
+            raise
+        connection.commit()
+
+
 def setup_db(cursor):
     """
     Create 3 tables in the database.
@@ -41,6 +140,7 @@ def setup_db(cursor):
     for each listing.
     Third table called 'qualifications' is similar to the second table but stores the multiple qualifications instead of
     links.
+    Afterwards, brings the tables up to date with migrate_db().
 
     Keyword arguments:
     cursor -- Used to execute SQL code to create tables
@@ -49,6 +149,11 @@ def setup_db(cursor):
     None
     """
 
+    # Tables made from scratch (also after being dropped) need every migration
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs';")
+    if cursor.fetchone() is None:
+        cursor.execute("PRAGMA user_version = 0;")
+
     cursor.execute('''CREATE TABLE IF NOT EXISTS jobs (
     job_id TEXT PRIMARY KEY,
     title TEXT NOT NULL,
@@ -74,6 +179,192 @@ def setup_db(cursor):
     FOREIGN KEY (job_id) REFERENCES jobs(job_id)
     );''')
 
+    migrate_db(cursor)
+
+
+def migrate_db(cursor):
+    """Runs the migrations in MIGRATIONS the database hasn't had yet, in one transaction.
+    The database's user_version is the amount of migrations it has had.
+
+    Keyword arguments:
+    cursor -- Used to execute SQL code to change tables
+
+    Returns:
+    None
+    """
+
+    cursor.execute("PRAGMA user_version;")
+    version = cursor.fetchone()[0]
+    if version >= len(MIGRATIONS):
+        return
+
+    with transaction(cursor):
+        for version, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            migration(cursor)
+            cursor.execute(f"PRAGMA user_version = {version};")
+
+
+def add_link_and_qualification_indexes(cursor):
+    """Migration 1. Removes repeated links and qualifications of a job (keeping the first), then makes them unique.
+    The unique indexes start with job_id, so they're also used to look up a job's links and qualifications.
+
+    Keyword arguments:
+    cursor -- Used to execute SQL code to change tables
+
+    Returns:
+    None
+    """
+
+    cursor.execute('''DELETE FROM related_links WHERE link_id NOT IN (
+                          SELECT MIN(link_id) FROM related_links GROUP BY job_id, url);''')
+    cursor.execute('''DELETE FROM qualifications WHERE qualification_id NOT IN (
+                          SELECT MIN(qualification_id) FROM qualifications GROUP BY job_id, qualification);''')
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_related_links_job_id_url ON related_links (job_id, url);")
+    cursor.execute('''CREATE UNIQUE INDEX IF NOT EXISTS idx_qualifications_job_id_qualification
+                      ON qualifications (job_id, qualification);''')
+
+
+def add_content_hash(cursor):
+    """Migration 2. Adds a column storing the hash of each job's data so unchanged jobs can be skipped when ingesting.
+    Jobs already stored are left without a hash, so they count as changed the next time they're ingested.
+
+    Keyword arguments:
+    cursor -- Used to execute SQL code to change tables
+
+    Returns:
+    None
+    """
+
+    cursor.execute("ALTER TABLE jobs ADD COLUMN content_hash TEXT;")
+
+
+def add_full_text_index(cursor):
+    """Migration 3. Adds a full-text index of each job's text fields, links and qualifications, and fills it with the
+    jobs already stored. Trigram tokens let it find any part of a word, the same way the keyword filter does.
+
+    Keyword arguments:
+    cursor -- Used to execute SQL code to change tables
+
+    Returns:
+    None
+    """
+
+    # Might be left over from tables that were dropped
+    cursor.execute("DROP TABLE IF EXISTS jobs_fts;")
+    cursor.execute(f'''CREATE VIRTUAL TABLE jobs_fts USING fts5(
+    {", ".join(FTS_COLUMNS)},
+    tokenize = "trigram"
+    );''')
+    cursor.execute(INSERT_FTS_SQL + ";")
+
+
+def add_yearly_salary(cursor):
+    """Migration 4. Adds the yearly salary range of each job as numbers, worked out once from the salary string, and
+    an index so jobs can be filtered by minimum salary. Fills them in for the jobs already stored.
+
+    Keyword arguments:
+    cursor -- Used to execute SQL code to change tables
+
+    Returns:
+    None
+    """
+
+    cursor.execute("ALTER TABLE jobs ADD COLUMN salary_min_yearly REAL;")
+    cursor.execute("ALTER TABLE jobs ADD COLUMN salary_max_yearly REAL;")
+    cursor.execute("CREATE INDEX idx_jobs_salary_min_yearly ON jobs (salary_min_yearly);")
+
+    cursor.execute("SELECT job_id, salary FROM jobs;")
+    rows = [jobs_filtering.get_yearly_salary_range(salary) + (job_id,) for job_id, salary in cursor.fetchall()]
+    cursor.executemany("UPDATE jobs SET salary_min_yearly = ?, salary_max_yearly = ? WHERE job_id = ?;", rows)
+
+
+def add_city(cursor):
+    """Migration 5. Adds the city of each job (its location without zipcode or extra text, as the location filter
+    shows it) and an index so jobs can be filtered by city. Fills it in for the jobs already stored.
+
+    Keyword arguments:
+    cursor -- Used to execute SQL code to change tables
+
+    Returns:
+    None
+    """
+
+    cursor.execute("ALTER TABLE jobs ADD COLUMN city TEXT DEFAULT \"\";")
+    cursor.execute("CREATE INDEX idx_jobs_city ON jobs (city);")
+
+    cursor.execute("SELECT job_id, location FROM jobs;")
+    rows = [(jobs_filtering.get_city_str(location) if location else "", job_id) for job_id, location in cursor.fetchall()]
+    cursor.executemany("UPDATE jobs SET city = ? WHERE job_id = ?;", rows)
+
+
+def add_coordinates(cursor):
+    """Migration 6. Adds the coordinates of each job's location, filled in by geocode_jobs(). A job whose location
+    changes loses its coordinates, so it's geocoded again.
+
+    Keyword arguments:
+    cursor -- Used to execute SQL code to change tables
+
+    Returns:
+    None
+    """
+
+    cursor.execute("ALTER TABLE jobs ADD COLUMN latitude REAL;")
+    cursor.execute("ALTER TABLE jobs ADD COLUMN longitude REAL;")
+    cursor.execute('''CREATE TRIGGER jobs_location_changed AFTER UPDATE OF location ON jobs
+                      WHEN OLD.location IS NOT NEW.location
+                      BEGIN
+                          UPDATE jobs SET latitude = NULL, longitude = NULL WHERE rowid = NEW.rowid;
+                      END;''')
+
+
+def add_full_text_id_and_salary(cursor):
+    """Migration 7. Builds the full-text index again so it also has each job's id, posting age and salary, which the
+    in-memory keyword filter searches too.
+
+    Keyword arguments:
+    cursor -- Used to execute SQL code to change tables
+
+    Returns:
+    None
+    """
+
+    add_full_text_index(cursor)
+
+
+def add_offline_geocoder_version(cursor):
+    """Migration 8. Adds the version of the offline geocoder that last failed to find each job's location, so
+    geocode_jobs() only asks it again once its data changes. A job whose location changes loses it, along with its
+    coordinates.
+
+    Keyword arguments:
+    cursor -- Used to execute SQL code to change tables
+
+    Returns:
+    None
+    """
+
+    cursor.execute("ALTER TABLE jobs ADD COLUMN offline_geocoder_version TEXT;")
+    cursor.execute("DROP TRIGGER jobs_location_changed;")
+    cursor.execute('''CREATE TRIGGER jobs_location_changed AFTER UPDATE OF location ON jobs
+                      WHEN OLD.location IS NOT NEW.location
+                      BEGIN
+                          UPDATE jobs SET latitude = NULL, longitude = NULL, offline_geocoder_version = NULL
+                          WHERE rowid = NEW.rowid;
+                      END;''')
+
+
+# Each migration upgrades the tables by one version. Only add to the end.
+MIGRATIONS = [
+    add_link_and_qualification_indexes,
+    add_content_hash,
+    add_full_text_index,
+    add_yearly_salary,
+    add_city,
+    add_coordinates,
+    add_full_text_id_and_salary,
+    add_offline_geocoder_version,
+]
+
 
 def insert_into_db(cursor, job):
     """Insert given data into database.
@@ -89,33 +380,26 @@ def insert_into_db(cursor, job):
     None
     """
 
-    # Create string of SQL command used to insert new row into jobs table
-    column_names = ["job_id", "title", "company_name", "location", "description", "posted_at", "salary", "remote"]
-    columns_str = ", ".join(column_names)
-    placeholders_str = ", ".join("?" * len(column_names))
-    sql_command = f'''INSERT OR IGNORE INTO jobs ({columns_str})
-                      VALUES ({placeholders_str});'''
-
-    cursor.execute(sql_command, job[:8])
+    cursor.execute(INSERT_JOB_SQL, get_job_row(job))
 
     # Insert every link individually into related_links table
     seen = set()  # Can't add all links to set because order not assured makes it hard to test
     for link in job[8]:
         if link not in seen:
-            cursor.execute('''INSERT OR IGNORE INTO related_links (job_id, url)
-                                      VALUES (?, ?);''', (job[0], link))
+            cursor.execute(INSERT_LINK_SQL, (job[0], link))
             seen.add(link)
 
     # Insert every qualification individually into qualifications table
     for q in job[9]:
-        cursor.execute('''INSERT OR IGNORE INTO qualifications (job_id, qualification)
-                                  VALUES (?, ?)''', (job[0], q))
+        cursor.execute(INSERT_QUALIFICATION_SQL, (job[0], q))
+
+    index_jobs(cursor, [job[0]])
 
 
 def insert_jobs(cursor, jobs):
     """Insert given data into database.
     Data in jobs must be ordered correctly. If no data for something, give it empty value.
-    Uses _insert_jobs() to catch exceptions.
+    Uses insert_jobs_bulk() and catches exceptions.
 
     Keyword arguments:
     cursor -- Used to insert values into the appropriate tables
@@ -123,52 +407,397 @@ def insert_jobs(cursor, jobs):
             Order of data: (job_id, title, company_name, location, description, posted_at, salary,
                             remote, links, qualifications)
 
+    Returns:
+    (inserted, skipped) -- Amount of rows inserted and skipped across all tables, or (0, 0) if inserting failed
+    """
+
+    try:
+        return insert_jobs_bulk(cursor, jobs)
+    except sqlite3.OperationalError as e:
+        print(f"Error inserting jobs {e}.")
+        return 0, 0
+
+
+def insert_jobs_bulk(cursor, jobs, batch_size=10_000):
+    """Insert given data into database in batches inside one transaction.
+    Rows already in the database (or missing required data) are skipped. If anything fails, nothing is inserted.
+
+    Keyword arguments:
+    cursor -- Used to insert values into the appropriate tables
+    jobs -- Iterable of tuples of jobs. Only batch_size jobs are held at a time, so it can be a generator.
+            Order of data: (job_id, title, company_name, location, description, posted_at, salary,
+                            remote, links, qualifications)
+    batch_size -- Amount of jobs to send to the database at a time
+
+    Returns:
+    (inserted, skipped) -- Amount of rows inserted and skipped across all tables
+    """
+
+    attempted = 0
+    inserted = 0
+
+    with transaction(cursor):
+        jobs = iter(jobs)
+        while batch := list(islice(jobs, batch_size)):
+            batch_attempted, batch_inserted = insert_batch(cursor, batch)
+            attempted += batch_attempted
+            inserted += batch_inserted
+
+    return inserted, attempted - inserted
+
+
+def insert_batch(cursor, batch):
+    """Insert a batch of jobs along with their links and qualifications using one executemany per table.
+
+    Keyword arguments:
+    cursor -- Used to insert values into the appropriate tables
+    batch -- List of tuples of jobs
+
+    Returns:
+    (attempted, inserted) -- Amount of rows tried to be inserted and actually inserted across all tables
+    """
+
+    changes_before = cursor.connection.total_changes
+    job_rows = get_job_rows(batch)
+    # Same link twice for a job is only inserted once. dict keeps the order of links.
+    link_rows = [(j[0], link) for j in batch for link in dict.fromkeys(j[8])]
+    qualification_rows = [(j[0], q) for j in batch for q in j[9]]
+
+    cursor.executemany(INSERT_JOB_SQL, job_rows)
+    cursor.executemany(INSERT_LINK_SQL, link_rows)
+    cursor.executemany(INSERT_QUALIFICATION_SQL, qualification_rows)
+    inserted = cursor.connection.total_changes - changes_before
+
+    index_jobs(cursor, [j[0] for j in batch])
+    return len(job_rows) + len(link_rows) + len(qualification_rows), inserted
+
+
+def index_jobs(cursor, job_ids):
+    """Replace the full-text index rows of jobs with their currently stored data.
+
+    Keyword arguments:
+    cursor -- Used to update the full-text index
+    job_ids -- List of ids of jobs to index
+
     Returns:
     None
     """
 
-    for j in jobs:
-        try:
-            insert_into_db(cursor, j)
-        except sqlite3.IntegrityError:
-            print(f"Error inserting job {j[0]}. It's already there.")
-        except sqlite3.OperationalError as e:
-            print(f"Error inserting job {e}.")
+    job_ids = [(job_id,) for job_id in dict.fromkeys(job_ids)]
+    cursor.executemany(DELETE_FTS_SQL, job_ids)
+    cursor.executemany(INSERT_FTS_SQL + " WHERE job_id = ?;", job_ids)
+
+
+def get_keyword_condition(keyword):
+    """Gets an SQL condition on the jobs table that's true for jobs containing a keyword, using the full-text index.
+
+    Keyword arguments:
+    keyword -- String to be found in job data
+
+    Returns:
+    (condition, params) -- SQL condition and the parameters it takes
+    """
+
+    if len(keyword) >= 3:
+        # Quoted as a phrase so the keyword is matched as is rather than as a query
+        return "jobs.rowid IN (SELECT rowid FROM jobs_fts WHERE jobs_fts MATCH ?)", ('"' + keyword.replace('"', '""') + '"',)
+
+    # Too short for trigrams, so each column is scanned. LIKE only ignores the case of ASCII letters.
+    pattern = "%" + keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    conditions = " OR ".join(f"{c} LIKE ? ESCAPE '\\'" for c in FTS_COLUMNS)
+    return f"jobs.rowid IN (SELECT rowid FROM jobs_fts WHERE {conditions})", (pattern,) * len(FTS_COLUMNS)
+
+
+def get_job_row(job):
+    """Gets the values stored in the jobs table for a job, in the order of STORED_COLUMNS.
+
+    Keyword arguments:
+    job -- Tuple of job
+
+    Returns:
+    Tuple of values for the jobs table
+    """
+
+    return get_job_rows([job])[0]
+
+
+def get_job_rows(jobs):
+    """Gets the values stored in the jobs table for jobs, in the order of STORED_COLUMNS.
+    Yearly salaries of all the jobs are worked out together with jobs_salary.yearly_salary_arrays().
+
+    Keyword arguments:
+    jobs -- List of tuples of jobs
+
+    Returns:
+    List of tuples of values for the jobs table
+    """
+
+    salaries = jobs_salary.to_db_values(*jobs_salary.yearly_salary_arrays([j[6] for j in jobs]))
+    return [tuple(j[:8]) + (get_job_hash(j),) + salary + (jobs_filtering.get_city_str(j[3]) if j[3] else "",)
+            for j, salary in zip(jobs, salaries)]
+
+
+def get_job_hash(job):
+    """Hashes all the data of a job, including its links and qualifications, to tell when a job has changed.
+
+    Keyword arguments:
+    job -- Tuple of job
+
+    Returns:
+    Hex digest of the job's data
+    """
+
+    return hashlib.sha256(json.dumps(list(job[:10]), default=str).encode()).hexdigest()
+
+
+def ingest_jobs(cursor, jobs, batch_size=10_000):
+    """Bring the database up to date with given jobs inside one transaction, only writing what has changed.
+    Jobs not in the database are inserted. Jobs whose data differs from what's stored are updated, and their links and
+    qualifications are replaced. Unchanged jobs aren't written. Only the first of repeated job ids is used.
+
+    Keyword arguments:
+    cursor -- Used to read and write the appropriate tables
+    jobs -- Iterable of tuples of jobs
+            Order of data: (job_id, title, company_name, location, description, posted_at, salary,
+                            remote, links, qualifications)
+    batch_size -- Amount of jobs to send to the database at a time
+
+    Returns:
+    summary -- Dictionary of amounts of "new", "changed", "unchanged" and "repeated" jobs
+    """
+
+    summary = {"new": 0, "changed": 0, "unchanged": 0, "repeated": 0}
+
+    cursor.execute("SELECT job_id, content_hash FROM jobs;")
+    known_hashes = dict(cursor.fetchall())
+    seen = set()
+
+    with transaction(cursor):
+        jobs = iter(jobs)
+        while batch := list(islice(jobs, batch_size)):
+            new_jobs = []
+            changed_jobs = []
+            for j in batch:
+                if j[0] in seen:
+                    summary["repeated"] += 1
+                    continue
+                seen.add(j[0])
+
+                if j[0] not in known_hashes:
+                    new_jobs.append(j)
+                elif known_hashes[j[0]] != get_job_hash(j):
+                    changed_jobs.append(j)
+                else:
+                    summary["unchanged"] += 1
+
+            if changed_jobs:
+                cursor.executemany(UPDATE_JOB_SQL, [row[1:] + (row[0],) for row in get_job_rows(changed_jobs)])
+                cursor.executemany("DELETE FROM related_links WHERE job_id = ?;", [(j[0],) for j in changed_jobs])
+                cursor.executemany("DELETE FROM qualifications WHERE job_id = ?;", [(j[0],) for j in changed_jobs])
+            insert_batch(cursor, new_jobs + changed_jobs)
+
+            summary["new"] += len(new_jobs)
+            summary["changed"] += len(changed_jobs)
+
+    return summary
+
+
+def renormalize_salaries(cursor):
+    """Works out the yearly salary range of every stored job again from its salary string, in one pass.
+    Useful after the way salaries are read changes.
+
+    Keyword arguments:
+    cursor -- Used to read and update the jobs table
+
+    Returns:
+    Amount of jobs updated
+    """
+
+    cursor.execute("SELECT rowid, salary FROM jobs;")
+    rows = cursor.fetchall()
+    salaries = jobs_salary.to_db_values(*jobs_salary.yearly_salary_arrays([r[1] for r in rows]))
+
+    with transaction(cursor):
+        cursor.executemany("UPDATE jobs SET salary_min_yearly = ?, salary_max_yearly = ? WHERE rowid = ?;",
+                           [salary + (r[0],) for r, salary in zip(rows, salaries)])
+    return len(rows)
+
+
+def geocode_jobs(cursor, geocoder=None, cache=None, offline_geocoder=None, rate_limiter=None):
+    """Stores the coordinates of jobs that don't have them yet. Locations are normalized the way the map shows them
+    (without extra text in parentheses), and each distinct one is geocoded once. Jobs whose location isn't found are
+    left without coordinates, so they're tried again next time (the cache keeps that from asking the geocoder again).
+    The offline geocoder isn't asked again about a location it didn't find until its version changes, so when every
+    job without coordinates has been tried, it isn't even loaded. Those jobs are still looked up in the cache.
+    Geocoding happens before the transaction, so the database isn't locked while waiting on the geocoder.
+
+    Keyword arguments:
+    cursor -- Used to read and update the jobs table
+    geocoder -- geopy geocoder, such as Nominatim, or None to only use the offline geocoder and cache
+    cache -- jobs_geocoding.GeocodeCache to check first and store results in, or None
+    offline_geocoder -- jobs_geocoding.Geocoder to try after the cache, such as GazetteerGeocoder, or None
+    rate_limiter -- jobs_geocoding.RateLimiter for requests to the geocoder, or None
+
+    Returns:
+    summary -- Dictionary of amounts of "located" and "not found" jobs
+    """
+
+    offline_version = offline_geocoder.get_version() if offline_geocoder is not None else None
+    cursor.execute('''SELECT rowid, location, offline_geocoder_version FROM jobs
+                      WHERE latitude IS NULL AND location != '';''')
+    job_rowids = {}
+    untried_locations = set()
+    for rowid, location, version in cursor.fetchall():
+        location = jobs_filtering.remove_parenthesis_in_location(location)
+        job_rowids.setdefault(location, []).append(rowid)
+        if offline_version is None or version != offline_version:
+            untried_locations.add(location)
+
+    rows = []
+    missed_rows = []
+    summary = {"located": 0, "not found": 0}
+    results = chain(
+        jobs_geocoding.geocode_locations([l for l in job_rowids if l in untried_locations], geocoder, cache,
+                                         rate_limiter, offline_geocoder=offline_geocoder),
+        jobs_geocoding.geocode_locations([l for l in job_rowids if l not in untried_locations], geocoder, cache,
+                                         rate_limiter))
+    for location, coordinates in results:
+        if coordinates:
+            rows += [(coordinates[0], coordinates[1], rowid) for rowid in job_rowids[location]]
+            summary["located"] += len(job_rowids[location])
+        else:
+            summary["not found"] += len(job_rowids[location])
+            if offline_version is not None and location in untried_locations:
+                missed_rows += [(offline_version, rowid) for rowid in job_rowids[location]]
+
+    with transaction(cursor):
+        cursor.executemany("UPDATE jobs SET latitude = ?, longitude = ? WHERE rowid = ?;", rows)
+        cursor.executemany("UPDATE jobs SET offline_geocoder_version = ? WHERE rowid = ?;", missed_rows)
+    return summary
+
+
+def get_job_coordinates(cursor, job_ids, batch_size=500):
+    """Gets the stored coordinates of jobs, looking them up by job id a batch at a time.
+
+    Keyword arguments:
+    cursor -- Used to read the jobs table
+    job_ids -- Iterable of ids of jobs
+    batch_size -- Amount of job ids to look up in one query
+
+    Returns:
+    Dictionary of job id to (latitude, longitude), only for jobs that have coordinates
+    """
+
+    coordinates = {}
+    job_ids = iter(job_ids)
+    while batch := list(islice(job_ids, batch_size)):
+        cursor.execute(f'''SELECT job_id, latitude, longitude FROM jobs
+                          WHERE job_id IN ({", ".join("?" * len(batch))}) AND latitude IS NOT NULL;''', batch)
+        coordinates.update((job_id, (latitude, longitude)) for job_id, latitude, longitude in cursor.fetchall())
+    return coordinates
+
+
+def get_filtered_job_ids(cursor, remote_checked, min_salary, keyword, city, candidate_job_ids=None):
+    """Find jobs matching all filters of MainWindow with one query over indexed columns and the full-text index.
+    Filters with no value aren't part of the query. Given the ids of jobs matching broader filters, only those jobs
+    are checked, looked up by their primary key.
+
+    Keyword arguments:
+    cursor -- Used to search the database
+    remote_checked -- whether to only find remote jobs
+    min_salary -- minimum yearly salary, or 0 for any salary
+    keyword -- string to be found in job data, or "" for any job
+    city -- city of job as given by jobs_filtering.get_city_str(), or "" for any city
+    candidate_job_ids -- ids of the only jobs to check, like the result of broader filters, or None to check all jobs
+
+    Returns:
+    List of ids of matching jobs, ordered by job id
+    """
+
+    conditions = []
+    params = []
+    if candidate_job_ids is not None:
+        # Sent as one JSON array so any amount of ids is a single parameter
+        conditions.append("jobs.job_id IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(list(candidate_job_ids)))
+    if remote_checked:
+        conditions.append("jobs.remote")
+    if min_salary > 0:
+        conditions.append("jobs.salary_min_yearly >= ?")
+        params.append(min_salary)
+    if city:
+        conditions.append("jobs.city = ?")
+        params.append(city)
+    if keyword:
+        condition, keyword_params = get_keyword_condition(keyword)
+        conditions.append(condition)
+        params += keyword_params
+
+    where_str = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    cursor.execute(f"SELECT jobs.job_id FROM jobs {where_str} ORDER BY jobs.job_id;", params)
+    return [row[0] for row in cursor.fetchall()]
 
 
 def get_jobs(cursor):
     """Get job data from database tables.
+    Each job's links and qualifications are gathered by their own subquery using the job_id indexes, so jobs aren't
+    joined to every combination of their links and qualifications.
 
     Keyword arguments:
     cursor -- Used to get job data from tables
 
     Returns:
-    jobs -- List of lists of jobs containing links and qualifications as lists
+    jobs -- List of lists of jobs containing links and qualifications as lists (in the order they were inserted)
     """
 
-    # Makes it much less likely it will be found in the given text
-    delimiter = "\nasdfqwerzxcv"
+    return list(iter_jobs(cursor))
 
-    # Get job data (links and qualifications go with their associated job)
-    cursor.execute(f"""
-        SELECT jobs.*, 
-        GROUP_CONCAT(related_links.url, '\n') AS related_links, 
-        GROUP_CONCAT(qualifications.qualification, '{delimiter}') AS qualifications
-        
-        FROM jobs
-        LEFT JOIN related_links ON jobs.job_id = related_links.job_id
-        LEFT JOIN qualifications ON jobs.job_id = qualifications.job_id
-        GROUP BY jobs.job_id
-    """)
 
-    jobs = cursor.fetchall()
-    jobs = [list(j) for j in jobs]  # Convert from tuples
+def iter_jobs(cursor, batch_size=1000, columns=None, after_job_id=None):
+    """Get job data from database tables one batch at a time, ordered by job_id.
+    Each batch is its own query starting after the last job_id of the batch before (keyset pagination), so only one
+    batch is held in memory and the cursor passed in is free to be used between batches.
 
-    # Links and qualifications from database get sent as a single string. Convert to list.
-    for i, j in enumerate(jobs):
-        if j[-2]:  # links
-            jobs[i][-2] = j[-2].split('\n')
-        if j[-1]:  # qualifications
-            jobs[i][-1] = j[-1].split(delimiter)
+    Keyword arguments:
+    cursor -- Used to get job data from tables
+    batch_size -- Amount of jobs to get from the database at a time
+    columns -- Names of columns to get (from JOB_COLUMNS, "related_links" and "qualifications"). None gets all of them
+               in the order of the database.
+    after_job_id -- Only get jobs with a job_id after this one. None starts from the first job.
+
+    Returns:
+    Generator of lists of jobs containing links and qualifications as lists
+    """
 
-    return jobs
+    if columns is None:
+        columns = JOB_COLUMNS + ["related_links", "qualifications"]
+    unknown = [c for c in columns if c not in JOB_SELECT_SQL]
+    if unknown:
+        raise ValueError(f"Unknown job columns: {unknown}")
+
+    list_indexes = [i for i, c in enumerate(columns) if c in LIST_COLUMNS]
+    select_str = ", ".join(["jobs.job_id"] + [JOB_SELECT_SQL[c] for c in columns])
+    sql_command = f"SELECT {select_str} FROM jobs WHERE jobs.job_id > ? ORDER BY jobs.job_id LIMIT ?;"
+    first_sql_command = f"SELECT {select_str} FROM jobs ORDER BY jobs.job_id LIMIT ?;"
+
+    batch_cursor = cursor.connection.cursor()
+    try:
+        while True:
+            if after_job_id is None:
+                batch_cursor.execute(first_sql_command, (batch_size,))
+            else:
+                batch_cursor.execute(sql_command, (after_job_id, batch_size))
+
+            rows = batch_cursor.fetchmany(batch_size)
+            for row in rows:
+                # First item is only there to know where the next batch starts
+                job = list(row[1:])
+                for i in list_indexes:
+                    job[i] = json.loads(job[i])
+                yield job
+
+            if len(rows) < batch_size:
+                break
+            after_job_id = rows[-1][0]
+    finally:
+        batch_cursor.close()
@@ -1,41 +1,230 @@
 """Module for data processing from Excel files used for this project."""
 
 
+import hashlib
+import marshal
+import os
+from itertools import islice
 from openpyxl import load_workbook
 
 
-def get_jobs(filename):
+# Jobs are kept in the snapshot in chunks of this many, so only one chunk is held in memory at a time
+SNAPSHOT_CHUNK_SIZE = 1000
+
+# Raised by marshal when a snapshot is truncated or otherwise damaged
+SNAPSHOT_READ_ERRORS = (OSError, EOFError, ValueError, TypeError, AttributeError)
+
+
+def get_jobs(filename, snapshot_path=None):
     """Gets job data from an Excel file. Order of data is ordered to match order of database columns.
+    If given a snapshot file, jobs are loaded from it instead while the Excel file hasn't changed. Otherwise, the Excel
+    file is read and the snapshot is written for next time.
 
     Keyword arguments:
     filename -- Excel xlsx file storing job data
+    snapshot_path -- File to keep parsed jobs in, or None to always read the Excel file
 
     Returns:
     jobs -- Job data from Excel file
     """
 
-    workbook = load_workbook(filename=filename)
-    sheet = workbook.active
+    if snapshot_path is None:
+        return list(iter_jobs(filename))
+    return list(iter_cached_jobs(filename, snapshot_path))
+
+
+def iter_cached_jobs(filename, snapshot_path):
+    """Gets job data one job at a time like iter_jobs(), from the snapshot while the Excel file hasn't changed.
+    Otherwise, the Excel file is read and the snapshot is written as its rows are read. Either way, only one chunk of
+    jobs is held in memory at a time.
+    A snapshot found to be damaged partway through (like a truncated file) is deleted, and the rest of the jobs come
+    from the Excel file. The snapshot was made from the same version of the file, so the jobs already given are the
+    file's first jobs and are skipped.
+
+    Keyword arguments:
+    filename -- Excel xlsx file storing job data
+    snapshot_path -- File to keep parsed jobs in
+
+    Returns:
+    Generator of tuples of jobs, ordered to match order of database columns
+    """
+
+    done = 0
+    jobs = load_snapshot(filename, snapshot_path)
+    if jobs is not None:
+        while True:
+            try:
+                job = next(jobs)
+            except StopIteration:
+                return
+            except SNAPSHOT_READ_ERRORS:
+                print(f"Snapshot {snapshot_path} is damaged, reading {filename} instead.")
+                try:
+                    os.remove(snapshot_path)
+                except OSError:
+                    pass
+                break
+            yield job
+            done += 1
+
+    yield from islice(write_snapshot(filename, snapshot_path, iter_jobs(filename)), done, None)
+
+
+def get_file_key(filename, content_hash=None):
+    """Gets what identifies a version of a file: its path, size, modification time and content hash.
+
+    Keyword arguments:
+    filename -- File to identify
+    content_hash -- Hex digest of the file if already known. Worked out when None.
+
+    Returns:
+    Dictionary identifying the file's current version
+    """
+
+    stat = os.stat(filename)
+    if content_hash is None:
+        digest = hashlib.sha256()
+        with open(filename, "rb") as file:
+            while chunk := file.read(1024 * 1024):
+                digest.update(chunk)
+        content_hash = digest.hexdigest()
+    return {"path": os.path.abspath(filename), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+            "sha256": content_hash, "format": marshal.version}
+
+
+def load_snapshot(filename, snapshot_path):
+    """Loads jobs from a snapshot if it was made from the current version of the Excel file.
+    When only the modification time has changed (like after a copy), the file's hash is checked and the snapshot is
+    kept if the contents are the same. It's then written again with the new modification time as it's read.
+
+    Keyword arguments:
+    filename -- Excel xlsx file the snapshot was made from
+    snapshot_path -- Snapshot file
+
+    Returns:
+    jobs -- Generator of job data from the snapshot, or None if there's no valid snapshot
+    """
+
+    try:
+        file = open(snapshot_path, "rb")
+    except OSError:
+        return None
+
+    try:
+        key = marshal.load(file)
+        stat = os.stat(filename)
+        if key.get("format") != marshal.version or key.get("layout") != "chunks" \
+                or key.get("path") != os.path.abspath(filename) or key.get("size") != stat.st_size:
+            file.close()
+            return None
+
+        if key.get("mtime_ns") != stat.st_mtime_ns:
+            if get_file_key(filename)["sha256"] != key.get("sha256"):
+                file.close()
+                return None
+            return write_snapshot(filename, snapshot_path, read_snapshot(file), key["sha256"])
+    except SNAPSHOT_READ_ERRORS:
+        file.close()
+        return None
+
+    return read_snapshot(file)
+
+
+def read_snapshot(file):
+    """Reads the jobs of a snapshot one chunk at a time, after its key has been read. Closes the file once every job
+    is read (or the generator is closed).
+
+    Keyword arguments:
+    file -- Snapshot file open for reading in binary mode
+
+    Returns:
+    Generator of job data
+    """
+
+    with file:
+        while (chunk := marshal.load(file)) is not None:
+            yield from chunk
+
+
+def write_snapshot(filename, snapshot_path, jobs, content_hash=None):
+    """Writes jobs to a snapshot file along with what identifies the Excel file's version, passing each job on as it's
+    written. Written to a temporary file that only replaces the snapshot once every job is written, so a half-written
+    snapshot is never loaded.
+
+    Keyword arguments:
+    filename -- Excel xlsx file the jobs are from
+    snapshot_path -- Snapshot file to write
+    jobs -- Iterable of job data from the Excel file
+    content_hash -- Hex digest of the Excel file if already known
+
+    Returns:
+    Generator of the jobs written
+    """
 
-    jobs = []
+    temp_path = f"{snapshot_path}.tmp"
+    key = get_file_key(filename, content_hash)
+    key["layout"] = "chunks"
+    jobs = iter(jobs)
+    try:
+        with open(temp_path, "wb") as file:
+            marshal.dump(key, file)
+            while chunk := list(islice(jobs, SNAPSHOT_CHUNK_SIZE)):
+                marshal.dump(chunk, file)
+                yield from chunk
+            marshal.dump(None, file)
+    except BaseException:
+        # Jobs weren't all read, so the snapshot would be missing some
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    os.replace(temp_path, snapshot_path)
 
-    for row in sheet.iter_rows(min_row=2, values_only=True):
-        # Shaping tuple by how the database takes it
-        # Database:
-        # (job_id, title, company_name, location, description, posted_at, salary, remote, links, qualifications)
-        # Excel file:
-        # Company Name, Posting Age, Job ID, Country, Location, Publication Date, Salary Max, Salary Min, Salary Type,
-        #   Job Title
 
-        # Make salary string
-        if row[7] == row[6]:
-            salary = str(row[7])
-        else:
-            salary = f"{row[7]} - {row[6]}"
-        if row[8] != "N/A":
-            salary += f" {row[8]}"
+def iter_jobs(filename):
+    """Gets job data from an Excel file one row at a time, so memory use doesn't grow with the size of the sheet.
+    Workbook is opened read-only and closed once every row is read (or the generator is closed).
+
+    Keyword arguments:
+    filename -- Excel xlsx file storing job data
+
+    Returns:
+    Generator of tuples of jobs, ordered to match order of database columns
+    """
+
+    workbook = load_workbook(filename=filename, read_only=True)
+    try:
+        for row in workbook.active.iter_rows(min_row=2, values_only=True):
+            if row[2] is None:  # Read-only sheets can include empty rows at the end
+                continue
+            yield get_job_from_row(row)
+    finally:
+        workbook.close()
+
+
+def get_job_from_row(row):
+    """Shapes a row of the Excel file into a job tuple.
+
+    Keyword arguments:
+    row -- Tuple of values of a row in the Excel file
+
+    Returns:
+    Tuple of job, ordered to match order of database columns
+    """
+
+    # Shaping tuple by how the database takes it
+    # Database:
+    # (job_id, title, company_name, location, description, posted_at, salary, remote, links, qualifications)
+    # Excel file:
+    # Company Name, Posting Age, Job ID, Country, Location, Publication Date, Salary Max, Salary Min, Salary Type,
+    #   Job Title
 
-        jobs += [(row[2].strip(), row[9].strip(), row[0].strip(), row[4].strip(),
-                  "", row[1].strip(), salary, "", [], [])]
+    # Make salary string
+    if row[7] == row[6]:
+        salary = str(row[7])
+    else:
+        salary = f"{row[7]} - {row[6]}"
+    if row[8] != "N/A":
+        salary += f" {row[8]}"
 
-    return jobs
+    return (row[2].strip(), row[9].strip(), row[0].strip(), row[4].strip(),
+            "", row[1].strip(), salary, "", [], [])
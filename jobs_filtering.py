@@ -1,53 +1,219 @@
 """Functions to filter job list for MainWindow objects"""
 
 import re
+from collections import OrderedDict
+from operator import attrgetter, itemgetter
 
+from jobs_records import JobRecord
 
-def filter_keyword(jobs, keyword):
+
+def filter_jobs(jobs, remote_checked, user_min_salary, keyword, user_city, corpus=None):
+    """Filter jobs by all filters of MainWindow in a single pass, keeping their order.
+    Same result as filter_remote(), filter_min_salary(), filter_keyword() and filter_city_location() one after another.
+
+    Keyword arguments:
+    jobs -- all jobs from MainWindow object
+    remote_checked -- whether the user enabled remote jobs to be filtered
+    user_min_salary -- user given number for minimum salary
+    keyword -- text user inputted into "keyword" filter field
+    user_city -- city selected by user
+    corpus -- search text of each job from build_search_corpus(), in the same order as jobs. Built if None.
+
+    Returns:
+    jobs filtered based on all filters
+    """
+
+    if corpus is None:
+        corpus = build_search_corpus(jobs)
+    return [jobs[i] for i in filter_job_indexes(jobs, remote_checked, user_min_salary, keyword, user_city, corpus)]
+
+
+def filter_job_indexes(jobs, remote_checked, user_min_salary, keyword, user_city, corpus, indexes=None):
+    """Filter jobs by all filters of MainWindow in a single pass, giving the positions of matching jobs.
+
+    Keyword arguments:
+    jobs -- all jobs from MainWindow object
+    remote_checked -- whether the user enabled remote jobs to be filtered
+    user_min_salary -- user given number for minimum salary
+    keyword -- text user inputted into "keyword" filter field
+    user_city -- city selected by user
+    corpus -- search text of each job from build_search_corpus(), in the same order as jobs
+    indexes -- positions of jobs to check, like the result of a broader filter. None checks all jobs.
+
+    Returns:
+    List of positions in jobs of jobs matching all filters, in order
+    """
+
+    if indexes is None:
+        indexes = range(len(jobs))
+    keyword = keyword.lower()
+    remote, location, salary = get_filter_fields(jobs)
+
+    # Cheapest checks first so later ones run on fewer jobs
+    return [i for i in indexes
+            if (not remote_checked or remote(jobs[i]))
+            and keyword in corpus[i]
+            and (not user_city or (location(jobs[i]) and user_city == get_city_str(location(jobs[i]))))
+            and (user_min_salary <= 0 or user_min_salary <= get_yearly_salary(salary(jobs[i])))]
+
+
+def get_filter_fields(jobs):
+    """Gets functions reading the fields filters check from a job.
+    Fields of JobRecords are read as attributes, which is about twice as fast as indexing them.
+
+    Keyword arguments:
+    jobs -- list of jobs, either all JobRecords or all lists or tuples
+
+    Returns:
+    Functions getting remote, location and salary of a job
+    """
+
+    if jobs and isinstance(jobs[0], JobRecord):
+        return attrgetter("remote"), attrgetter("location"), attrgetter("salary")
+    return itemgetter(7), itemgetter(3), itemgetter(6)
+
+
+class FilterCache:
+    """Least recently used cache of filter results, keyed by (remote_checked, user_min_salary, keyword, user_city).
+    Besides exact matches, it can give the result of a broader filter so a narrower one only has to check those jobs.
+    Results are positions of jobs, so the cache must be cleared when the jobs change.
+    """
+
+    def __init__(self, max_size=32):
+        self.max_size = max_size
+        self.results = OrderedDict()
+
+    def get(self, filters):
+        """Gets the cached result of filters.
+
+        Keyword arguments:
+        filters -- tuple of (remote_checked, user_min_salary, keyword, user_city)
+
+        Returns:
+        List of positions of matching jobs, or None if not cached
+        """
+
+        if filters not in self.results:
+            return None
+        self.results.move_to_end(filters)
+        return self.results[filters]
+
+    def get_broader(self, filters):
+        """Gets the smallest cached result of a filter that every job matching the given filters also matches.
+
+        Keyword arguments:
+        filters -- tuple of (remote_checked, user_min_salary, keyword, user_city)
+
+        Returns:
+        List of positions of jobs to check, or None if no cached filter is broader
+        """
+
+        broader = [result for cached_filters, result in self.results.items() if is_narrower(filters, cached_filters)]
+        return min(broader, key=len, default=None)
+
+    def put(self, filters, result):
+        """Caches the result of filters, removing the least recently used result if the cache is full.
+
+        Keyword arguments:
+        filters -- tuple of (remote_checked, user_min_salary, keyword, user_city)
+        result -- list of positions of matching jobs
+
+        Returns:
+        None
+        """
+
+        self.results[filters] = result
+        self.results.move_to_end(filters)
+        if len(self.results) > self.max_size:
+            self.results.popitem(last=False)
+
+    def clear(self):
+        """Removes every cached result. Needed when the jobs change."""
+        self.results.clear()
+
+
+def is_narrower(filters, other_filters):
+    """Checks if every job matching filters also matches other_filters.
+
+    Keyword arguments:
+    filters -- tuple of (remote_checked, user_min_salary, keyword, user_city)
+    other_filters -- tuple of (remote_checked, user_min_salary, keyword, user_city)
+
+    Returns:
+    Boolean for if filters are the same as or narrower than other_filters
+    """
+
+    remote_checked, user_min_salary, keyword, user_city = filters
+    other_remote_checked, other_min_salary, other_keyword, other_city = other_filters
+    return ((remote_checked or not other_remote_checked)
+            and user_min_salary >= other_min_salary
+            and other_keyword.lower() in keyword.lower()
+            and (not other_city or user_city == other_city))
+
+
+def filter_keyword(jobs, keyword, corpus=None):
     """Search every job data fields to find whether they contain a string.
 
     Keyword arguments:
     jobs -- current state of filtered jobs from MainWindow object
     keyword -- text user inputted into "keyword" filter field
+    corpus -- search text of each job from build_search_corpus(), in the same order as jobs. Built if None.
 
     Returns:
     jobs filtered based on keyword
     """
 
-    return [j for j in jobs if keyword_in_job(keyword, j)]
+    if corpus is None:
+        corpus = build_search_corpus(jobs)
+    keyword = keyword.lower()
+    return [j for j, text in zip(jobs, corpus) if keyword in text]
 
 
-def keyword_in_job(keyword, job):
-    """Find keyword in job's sublists.
+def build_search_corpus(jobs):
+    """Gets the search text of every job so searching them is a single substring check per job.
+    Only needs to be built again when the jobs change.
 
     Keyword arguments:
-    keyword -- string to be found in job data
-    job -- list to be searched through for keyword
+    jobs -- list of jobs
 
     Returns:
-    Boolean for if keyword is found
+    List of search text of each job, in the same order as jobs
+    """
+
+    return [get_search_text(j) for j in jobs]
+
+
+def get_search_text(job):
+    """Joins a job's text fields, links and qualifications into one lowercase string.
+    Fields are separated by a character a keyword won't contain, so a keyword can't match across two fields.
+    Searches the same fields as the database's full-text index (jobs_db.FTS_COLUMNS), and lowercases letters one at a
+    time like its trigram tokens do, so both find the same jobs.
+
+    Keyword arguments:
+    job -- job data
+
+    Returns:
+    Search text of job
     """
 
     # First 7 items are just strings. Last two (links, qualifications) are lists of strings.
-    return (keyword_in_list(keyword, job[:7]) or
-            keyword_in_list(keyword, job[-2]) or
-            keyword_in_list(keyword, job[-1]))
+    fields = [item for item in job[:7] if isinstance(item, str)]
+    fields += [item for l in (job[-2], job[-1]) if l for item in l if isinstance(item, str)]
+    return "\0".join(fields).lower()
 
 
-def keyword_in_list(keyword, l):
-    """Searches list for keyword with null safety and case insensitivity.
+def filter_job_ids(jobs, job_ids):
+    """Keep jobs whose id is in a given set, such as the results of searching the database.
 
     Keyword arguments:
-    keyword -- string to be found in data
-    l -- list of data to be searched for keyword
+    jobs -- current state of filtered jobs from MainWindow object
+    job_ids -- set of ids of jobs to keep
 
     Returns:
-    Boolean for if keyword is found
+    jobs filtered based on job ids
     """
 
-    if not l:
-        return False
-    return any(keyword.lower() in item.lower() for item in l)
+    return [j for j in jobs if j[0] in job_ids]
 
 
 def filter_city_location(jobs, user_city):
@@ -150,41 +316,74 @@ def get_yearly_salary(salary):
     salary -- String of salary
 
     Returns:
-    new_salary -- Float of yearly salary
+    new_salary -- Float of yearly salary (low end of a range). 0 if there's no salary.
+    """
+
+    min_salary, max_salary = get_yearly_salary_range(salary)
+    return min_salary if min_salary is not None else 0
+
+
+# A number like "60", "1,500.50" or "120K". Minus sign only counts when it isn't joining a range like "10K-12K".
+SALARY_NUMBER_PATTERN = re.compile(r"((?<![\w.])-)?(\d[\d,]*(?:\.\d+)?)\s*([kK](?![a-zA-Z]))?")
+
+# How many of each pay period are in a year. Salaries with no period are yearly.
+SALARY_PERIODS_PER_YEAR = {"hour": 40 * 52, "day": 5 * 52, "daily": 5 * 52, "week": 52, "month": 12, "year": 1, "annual": 1}
+
+
+def get_yearly_salary_range(salary):
+    """Reads a salary string like "100K - 120K", "60 hourly", "25–30 an hour" or "35 - -1 hourly" as a yearly range.
+
+    Keyword arguments:
+    salary -- String of salary
+
+    Returns:
+    (min_salary, max_salary) -- Floats of yearly salary range. Both None if there's no salary. When there's no
+                                (valid) high end, max_salary is the same as min_salary.
     """
 
     if not salary:
-        return 0
+        return None, None
 
-    new_salary = re.findall("^[0-9K.]+", salary)[0]
+    numbers = []
+    for negative, number, thousands in SALARY_NUMBER_PATTERN.findall(str(salary)):
+        number = float(number.replace(",", "")) * (1000 if thousands else 1)
+        numbers.append(-number if negative else number)
+        if len(numbers) == 2:
+            break
 
-    if new_salary[-1] == "K":
-        new_salary = float(new_salary[:-1]) * 1000
-    else:
-        new_salary = float(new_salary)
+    if not numbers or numbers[0] <= 0:
+        return None, None
 
-    rate = salary.split()[-1]
-    if rate.startswith("hour"):  # could be "hourly"
-        new_salary *= 40 * 52
-    elif rate.startswith("week"):
-        new_salary *= 52
+    multiplier = 1
+    lower_salary = str(salary).lower()
+    for period, per_year in SALARY_PERIODS_PER_YEAR.items():
+        if period in lower_salary:
+            multiplier = per_year
+            break
 
-    return new_salary
+    min_salary = numbers[0]
+    max_salary = numbers[1] if len(numbers) == 2 and numbers[1] >= min_salary else min_salary
+    return min_salary * multiplier, max_salary * multiplier
 
 
-def format_jobs_for_map(jobs):
+def format_jobs_for_map(jobs, coordinates=None):
     """Prepare job data for map.
 
     Keyword arguments:
     jobs -- list of jobs
+    coordinates -- dictionary of job id to (latitude, longitude) stored in the database, from
+                   jobs_db.get_job_coordinates(), or None if there's no database
 
     Returns:
-    jobs_to_display -- formatted jobs for map: (id, title, company, formatted location)
+    jobs_to_display -- formatted jobs for map: (id, title, company, formatted location), followed by the job's stored
+                       (latitude, longitude) or None when coordinates are given
     """
 
     jobs_to_display = []
     for j in jobs:
         location = remove_parenthesis_in_location(j[3])
         curr_data = tuple(j[:3]) + (location,)
+        if coordinates is not None:
+            curr_data += (coordinates.get(j[0]),)
         jobs_to_display.append(curr_data)
     return jobs_to_display
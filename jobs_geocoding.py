@@ -0,0 +1,453 @@
+"""Module for turning job locations into coordinates for the map, with results kept on disk across runs."""
+
+import gzip
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+from collections import namedtuple
+from pathlib import Path
+from geopy.exc import GeocoderServiceError
+
+
+# Bundled US ZIP codes with their city, other accepted city names, state and coordinates. From the zipcodes package
+# (MIT license in us_gazetteer.LICENSE, data as of Oct. 2021). Found next to this module, wherever the program is run
+# from.
+GAZETTEER_FILE = Path(__file__).parent / "us_gazetteer.tsv.gz"
+
+US_STATES = {"alabama": "al", "alaska": "ak", "arizona": "az", "arkansas": "ar", "california": "ca",
+             "colorado": "co", "connecticut": "ct", "delaware": "de", "district of columbia": "dc", "florida": "fl",
+             "georgia": "ga", "hawaii": "hi", "idaho": "id", "illinois": "il", "indiana": "in", "iowa": "ia",
+             "kansas": "ks", "kentucky": "ky", "louisiana": "la", "maine": "me", "maryland": "md",
+             "massachusetts": "ma", "michigan": "mi", "minnesota": "mn", "mississippi": "ms", "missouri": "mo",
+             "montana": "mt", "nebraska": "ne", "nevada": "nv", "new hampshire": "nh", "new jersey": "nj",
+             "new mexico": "nm", "new york": "ny", "north carolina": "nc", "north dakota": "nd", "ohio": "oh",
+             "oklahoma": "ok", "oregon": "or", "pennsylvania": "pa", "puerto rico": "pr", "rhode island": "ri",
+             "south carolina": "sc", "south dakota": "sd", "tennessee": "tn", "texas": "tx", "utah": "ut",
+             "vermont": "vt", "virginia": "va", "washington": "wa", "west virginia": "wv", "wisconsin": "wi",
+             "wyoming": "wy"}
+
+ZIP_PATTERN = re.compile(r"\b(\d{5})(?:-\d{4})?\b")
+# Country at the end of a location like "Boston, MA, USA"
+COUNTRY_PATTERN = re.compile(r",?\s*(?:united states(?: of america)?|usa|us)$")
+
+SAINT_FORT_PATTERN = re.compile(r"\b(saint|fort)\b")
+
+Coordinates = namedtuple("Coordinates", ["latitude", "longitude"])
+
+
+class GeocodeCache:
+    """SQLite store of coordinates of location strings. Locations the geocoder couldn't find are stored too, so
+    they aren't looked up again every run, but they expire sooner in case the geocoder learns them.
+    """
+
+    def __init__(self, filename, ttl=90 * 24 * 60 * 60, negative_ttl=7 * 24 * 60 * 60):
+        """Opens (and creates if needed) the cache file.
+
+        Keyword arguments:
+        filename -- SQLite file to store coordinates in
+        ttl -- Seconds found coordinates stay valid. None keeps them forever.
+        negative_ttl -- Seconds a location that wasn't found stays cached. None keeps it forever.
+
+        Returns:
+        None
+        """
+
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.connection = sqlite3.connect(filename)
+        # Latitude and longitude are NULL for locations that weren't found
+        self.connection.execute('''CREATE TABLE IF NOT EXISTS geocodes (
+        location TEXT PRIMARY KEY,
+        latitude REAL,
+        longitude REAL,
+        created_at REAL NOT NULL
+        );''')
+        self.connection.commit()
+
+    def get(self, location):
+        """Gets the cached coordinates of a location.
+
+        Keyword arguments:
+        location -- Location string
+
+        Returns:
+        (latitude, longitude) if found, (None, None) if the location is cached as not found, or None if it isn't
+        cached or has expired
+        """
+
+        row = self.connection.execute("SELECT latitude, longitude, created_at FROM geocodes WHERE location = ?;",
+                                      (location,)).fetchone()
+        if row is None:
+            return None
+
+        latitude, longitude, created_at = row
+        ttl = self.ttl if latitude is not None else self.negative_ttl
+        if ttl is not None and time.time() - created_at > ttl:
+            return None
+        return latitude, longitude
+
+    def put(self, location, coordinates):
+        """Stores the coordinates of a location.
+
+        Keyword arguments:
+        location -- Location string
+        coordinates -- (latitude, longitude), or None if the location wasn't found
+
+        Returns:
+        None
+        """
+
+        latitude, longitude = coordinates if coordinates else (None, None)
+        self.connection.execute('''INSERT OR REPLACE INTO geocodes (location, latitude, longitude, created_at)
+                                   VALUES (?, ?, ?, ?);''', (location, latitude, longitude, time.time()))
+        self.connection.commit()
+
+    def evict(self):
+        """Removes expired coordinates and expired locations that weren't found.
+
+        Keyword arguments:
+        None
+
+        Returns:
+        None
+        """
+
+        now = time.time()
+        if self.ttl is not None:
+            self.connection.execute("DELETE FROM geocodes WHERE latitude IS NOT NULL AND created_at < ?;",
+                                    (now - self.ttl,))
+        if self.negative_ttl is not None:
+            self.connection.execute("DELETE FROM geocodes WHERE latitude IS NULL AND created_at < ?;",
+                                    (now - self.negative_ttl,))
+        self.connection.commit()
+
+    def close(self):
+        """Commits and closes the cache file.
+
+        Keyword arguments:
+        None
+
+        Returns:
+        None
+        """
+
+        self.connection.commit()
+        self.connection.close()
+
+
+class Geocoder(ABC):
+    """What MapWindow needs of a geocoder, the same as geopy geocoders like Nominatim: geocode() of a location
+    string gives an object with latitude and longitude, or None if the location isn't known.
+    """
+
+    @abstractmethod
+    def geocode(self, location):
+        """Gets coordinates of a location.
+
+        Keyword arguments:
+        location -- Location string
+
+        Returns:
+        Object with latitude and longitude, or None if the location isn't known
+        """
+
+    def get_version(self):
+        """Gets what identifies the data the geocoder answers from, so locations it didn't find are only asked about
+        again once the data changes.
+
+        Keyword arguments:
+        None
+
+        Returns:
+        Version string, or None if locations it didn't find should always be asked about again
+        """
+
+        return None
+
+
+class GazetteerGeocoder(Geocoder):
+    """Offline geocoder of US locations like "Boston, MA", "Cambridge, MA 02139" or "Austin, Texas", from the
+    bundled gazetteer file. A location with a ZIP code is placed at that ZIP code, and a city at the middle of its
+    ZIP codes. Anything else (like "Anywhere" or a street address without a ZIP code) isn't known.
+    The file is read the first time a location is looked up. Coordinates are kept in one compact array, and both
+    ZIP codes and normalized "city,state" keys map to positions in it.
+    """
+
+    def __init__(self, filename=GAZETTEER_FILE):
+        self.filename = filename
+        self.version = None
+        self.coordinates = None
+        self.zip_rows = None
+        self.city_rows = None
+
+    def load(self):
+        """Reads the gazetteer file into the index.
+
+        Keyword arguments:
+        None
+
+        Returns:
+        None
+        """
+
+        coordinates = array("d")
+        zip_rows = {}
+        city_sums = {}
+        other_city_sums = {}
+        # Most cities have several ZIP codes, so each city's key is only made once
+        keys = {}
+
+        with gzip.open(self.filename, "rt", encoding="utf-8") as file:
+            next(file)  # Header
+            for line in file:
+                zip_code, city, other_cities, state, latitude, longitude = line.rstrip("\n").split("\t")
+                latitude, longitude = float(latitude), float(longitude)
+                zip_rows[zip_code] = len(coordinates) // 2
+                coordinates.extend((latitude, longitude))
+
+                add_to_sum(city_sums, get_cached_city_key(keys, city, state), latitude, longitude)
+                for other_city in filter(None, other_cities.split("|")):
+                    add_to_sum(other_city_sums, get_cached_city_key(keys, other_city, state), latitude, longitude)
+
+        # Other accepted names of a city only count where no city has that name, so they don't move real cities
+        for key, sums in other_city_sums.items():
+            city_sums.setdefault(key, sums)
+
+        city_rows = {}
+        for key, (latitude_sum, longitude_sum, amount) in city_sums.items():
+            city_rows[key] = len(coordinates) // 2
+            coordinates.extend((latitude_sum / amount, longitude_sum / amount))
+
+        self.coordinates, self.zip_rows, self.city_rows = coordinates, zip_rows, city_rows
+
+    def get_version(self):
+        """Gets the hash of the gazetteer file, without reading it into the index.
+
+        Keyword arguments:
+        None
+
+        Returns:
+        Hex digest of the file
+        """
+
+        if self.version is None:
+            self.version = hashlib.sha256(Path(self.filename).read_bytes()).hexdigest()
+        return self.version
+
+    def geocode(self, location):
+        """Finds coordinates of a location in the gazetteer.
+
+        Keyword arguments:
+        location -- Location string
+
+        Returns:
+        Coordinates of location, or None if it isn't in the gazetteer
+        """
+
+        if self.coordinates is None:
+            self.load()
+        if not location:
+            return None
+
+        row = None
+        zip_match = ZIP_PATTERN.search(location)
+        if zip_match:
+            row = self.zip_rows.get(zip_match.group(1))
+        if row is None:
+            row = self.city_rows.get(get_location_key(location))
+        if row is None:
+            return None
+        return Coordinates(self.coordinates[2 * row], self.coordinates[2 * row + 1])
+
+
+def add_to_sum(sums, key, latitude, longitude):
+    """Adds coordinates to the running sums of a key, for averaging them later."""
+    latitude_sum, longitude_sum, amount = sums.get(key, (0.0, 0.0, 0))
+    sums[key] = (latitude_sum + latitude, longitude_sum + longitude, amount + 1)
+
+
+def get_cached_city_key(keys, city, state):
+    """get_city_key(), remembering keys already made in a dict."""
+    key = keys.get((city, state))
+    if key is None:
+        # States in the gazetteer are already abbreviated
+        key = keys[(city, state)] = f"{normalize_place(city)},{state.lower()}"
+    return key
+
+
+def normalize_place(name):
+    """Normalizes a city or state name so spellings like "St. Louis" and "saint louis" are the same.
+
+    Keyword arguments:
+    name -- City or state name
+
+    Returns:
+    Lowercase name with single spaces and no periods, and "saint" and "fort" shortened
+    """
+
+    name = " ".join(name.casefold().replace(".", "").split())
+    return SAINT_FORT_PATTERN.sub(lambda m: "st" if m.group(1) == "saint" else "ft", name)
+
+
+def get_city_key(city, state):
+    """Gets the key a city is found by in the gazetteer.
+
+    Keyword arguments:
+    city -- City name
+    state -- State abbreviation or name
+
+    Returns:
+    "city,state" with both normalized and the state abbreviated
+    """
+
+    state = normalize_place(state)
+    return f"{normalize_place(city)},{US_STATES.get(state, state)}"
+
+
+def get_location_key(location):
+    """Gets the gazetteer key of a location string like "Boston, MA", "Cambridge, MA 02139" or "Austin, Texas, USA".
+
+    Keyword arguments:
+    location -- Location string
+
+    Returns:
+    "city,state" key, or None if location isn't a city and state
+    """
+
+    location = COUNTRY_PATTERN.sub("", ZIP_PATTERN.sub("", location.casefold()).strip())
+    parts = [p for p in location.split(",") if p.strip()]
+    if len(parts) < 2:
+        return None
+    return get_city_key(parts[-2], parts[-1])
+
+
+class RateLimiter:
+    """Spaces out calls so no more than a set amount happen per second, such as requests to a geocoder that only
+    allows one request a second (Nominatim). Can be shared between threads, so the limit holds across every worker
+    making requests, even when one replaces another.
+    """
+
+    def __init__(self, requests_per_second, clock=time.monotonic, sleep=time.sleep):
+        """Sets up the limit.
+
+        Keyword arguments:
+        requests_per_second -- Most calls of wait() to let through each second
+        clock -- Function giving the current time in seconds
+        sleep -- Function waiting for a number of seconds, used when wait() isn't given a cancel event
+
+        Returns:
+        None
+        """
+
+        self.interval = 1 / requests_per_second
+        self.clock = clock
+        self.sleep = sleep
+        self.next_time = None
+        self.lock = threading.Lock()
+
+    def wait(self, cancel_event=None):
+        """Waits until another request is allowed. Callers in other threads wait their turn.
+
+        Keyword arguments:
+        cancel_event -- threading.Event that ends the wait early when set, or None to always wait it out
+
+        Returns:
+        True if the request can be made, False if the wait was cancelled
+        """
+
+        with self.lock:
+            now = self.clock()
+            if self.next_time is not None and now < self.next_time:
+                if cancel_event is None:
+                    self.sleep(self.next_time - now)
+                elif cancel_event.wait(self.next_time - now):
+                    # No request is made, so the next caller doesn't have to wait any longer
+                    return False
+                now = self.next_time
+            self.next_time = now + self.interval
+            return True
+
+
+def geocode_locations(locations, geocoder, cache=None, rate_limiter=None, cancel_event=None, offline_geocoder=None):
+    """Geocodes locations one at a time, giving each result as soon as it's known.
+    Only requests to the geocoder are rate limited, so locations known offline or cached come right away.
+
+    Keyword arguments:
+    locations -- Location strings
+    geocoder -- geopy geocoder, such as Nominatim, or None to only use the offline geocoder and cache
+    cache -- GeocodeCache to check first and store results in, or None
+    rate_limiter -- RateLimiter for requests to the geocoder, or None
+    cancel_event -- threading.Event set when geocoding should stop, even while waiting on the rate limiter, or None
+    offline_geocoder -- Geocoder to try after the cache and before the geocoder, such as GazetteerGeocoder, or None
+
+    Returns:
+    Generator of (location, coordinates) with coordinates as (latitude, longitude), or None if not found
+    """
+
+    for location in locations:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        if (rate_limiter is not None and get_known_coordinates(location, cache, offline_geocoder) is None
+                and not rate_limiter.wait(cancel_event)):
+            return
+        yield location, geocode_location(location, geocoder, cache, offline_geocoder)
+
+
+def get_known_coordinates(location, cache=None, offline_geocoder=None):
+    """Gets coordinates of location without asking a geocoder over the network: from the cache, then the offline
+    geocoder. The offline geocoder is still tried for a location cached as not found.
+
+    Keyword arguments:
+    location -- Location string
+    cache -- GeocodeCache, or None
+    offline_geocoder -- Geocoder to try when the cache doesn't have coordinates, such as GazetteerGeocoder, or None
+
+    Returns:
+    (latitude, longitude) if found, (None, None) if the location is cached as not found, or None if it isn't known
+    """
+
+    cached = cache.get(location) if cache is not None else None
+    if cached is not None and cached[0] is not None:
+        return cached
+    if offline_geocoder is not None:
+        found = offline_geocoder.geocode(location)
+        if found:
+            return found.latitude, found.longitude
+    return cached
+
+
+def geocode_location(location, geocoder, cache=None, offline_geocoder=None):
+    """Gets coordinates of location, from the offline geocoder or the cache if it's there. Otherwise the geocoder is
+    asked, and its answer is cached, including when it doesn't know the location. Failed requests aren't cached so
+    they're tried again.
+
+    Keyword arguments:
+    location -- Location string
+    geocoder -- geopy geocoder, such as Nominatim, or None to only use the offline geocoder and cache
+    cache -- GeocodeCache to check first and store results in, or None
+    offline_geocoder -- Geocoder to try after the cache and before the geocoder, such as GazetteerGeocoder, or None
+
+    Returns:
+    (latitude, longitude) of location, or None if it couldn't be found
+    """
+
+    known = get_known_coordinates(location, cache, offline_geocoder)
+    if known is not None:
+        return known if known[0] is not None else None
+    if geocoder is None:
+        return None
+
+    try:
+        geocoded = geocoder.geocode(location)
+    except GeocoderServiceError:  # Timed out, unavailable, rate limited, refused and the like
+        print(f"Geocoding failed for location: {location}")
+        return None
+
+    coordinates = (geocoded.latitude, geocoded.longitude) if geocoded else None
+    if cache is not None:
+        cache.put(location, coordinates)
+    return coordinates
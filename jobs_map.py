@@ -0,0 +1,95 @@
+"""Module for keeping the job markers on the map page up to date without rendering the page again.
+
+The page is rendered once with an empty marker cluster and a script that adds and removes markers by job id. After
+that, only the markers that changed are sent to it.
+"""
+
+import html
+import json
+
+
+# Defines updateJobMarkers(added, removed) on the map page. added is a list of [job id, latitude, longitude, popup]
+# and removed is a list of job ids. Markers are added and removed together, which the cluster handles much faster
+# than one at a time.
+MARKER_SCRIPT = """
+var jobMarkers = {};
+
+function updateJobMarkers(added, removed) {
+    var cluster = %(cluster)s;
+    var oldMarkers = [];
+    removed.forEach(function (jobId) {
+        if (jobId in jobMarkers) {
+            oldMarkers.push(jobMarkers[jobId]);
+            delete jobMarkers[jobId];
+        }
+    });
+    cluster.removeLayers(oldMarkers);
+
+    var newMarkers = [];
+    added.forEach(function (marker) {
+        var layer = L.marker([marker[1], marker[2]]).bindPopup(marker[3]);
+        jobMarkers[marker[0]] = layer;
+        newMarkers.push(layer);
+    });
+    cluster.addLayers(newMarkers);
+}
+"""
+
+
+def get_marker_script(cluster_name):
+    """Gets the script to add to the map page so markers can be updated.
+
+    Keyword arguments:
+    cluster_name -- JavaScript name of the map's MarkerCluster, from get_name()
+
+    Returns:
+    Script as a string
+    """
+
+    return MARKER_SCRIPT % {"cluster": cluster_name}
+
+
+def get_popup(title, company):
+    """Gets the popup shown when a job's marker is clicked.
+
+    Keyword arguments:
+    title -- Job title
+    company -- Company name
+
+    Returns:
+    Popup HTML, with the title and company escaped
+    """
+
+    return f"{html.escape(str(title))}<br><br>{html.escape(str(company))}"
+
+
+def get_marker_delta(shown, markers):
+    """Gets the changes that turn the markers shown on the page into the markers wanted.
+    A job whose marker moved or changed is removed and added again.
+
+    Keyword arguments:
+    shown -- dict of job id to (latitude, longitude, popup) of markers on the page
+    markers -- dict of job id to (latitude, longitude, popup) of markers wanted
+
+    Returns:
+    added -- list of [job id, latitude, longitude, popup] of markers to add
+    removed -- list of job ids of markers to remove
+    """
+
+    removed = [job_id for job_id, marker in shown.items() if markers.get(job_id) != marker]
+    added = [[job_id, *marker] for job_id, marker in markers.items() if shown.get(job_id) != marker]
+    return added, removed
+
+
+def get_update_script(added, removed):
+    """Gets the call updating markers on the page.
+
+    Keyword arguments:
+    added -- list of [job id, latitude, longitude, popup] of markers to add
+    removed -- list of job ids of markers to remove
+
+    Returns:
+    Script as a string
+    """
+
+    return f"updateJobMarkers({json.dumps(added)}, {json.dumps(removed)});"
@@ -0,0 +1,91 @@
+"""Compact record type for holding jobs in memory while the GUI is running."""
+
+import sys
+
+
+class JobRecord:
+    """A job with one slot per field instead of a list, so each job takes less memory.
+    Can still be indexed and sliced like the job lists it replaces (job[1] is the title, job[-2] the links).
+    Company, location, posting age and salary strings are interned, so jobs with the same ones share a single string.
+    Links and qualifications are tuples, so records can be hashed and used in sets or as dictionary keys.
+    """
+
+    FIELDS = ("job_id", "title", "company_name", "location", "description", "posted_at", "salary", "remote",
+              "links", "qualifications")
+    __slots__ = FIELDS
+
+    def __init__(self, job_id, title, company_name, location, description, posted_at, salary, remote, links,
+                 qualifications):
+        self.job_id = job_id
+        self.title = title
+        self.company_name = intern_str(company_name)
+        self.location = intern_str(location)
+        self.description = description
+        self.posted_at = intern_str(posted_at)
+        self.salary = intern_str(salary)
+        self.remote = remote
+        self.links = tuple(links) if links else ()
+        self.qualifications = tuple(qualifications) if qualifications else ()
+
+    @classmethod
+    def from_job(cls, job):
+        """Makes a record from a job list or tuple.
+
+        Keyword arguments:
+        job -- Job data
+                Order of data: (job_id, title, company_name, location, description, posted_at, salary,
+                                remote, links, qualifications)
+
+        Returns:
+        JobRecord of the job
+        """
+
+        return cls(*job[:10])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [getattr(self, field) for field in self.FIELDS[index]]
+        return getattr(self, self.FIELDS[index])
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def __iter__(self):
+        return (getattr(self, field) for field in self.FIELDS)
+
+    def __eq__(self, other):
+        if not isinstance(other, JobRecord):
+            return NotImplemented
+        return tuple(self) == tuple(other)
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return f"JobRecord{tuple(self)!r}"
+
+
+def intern_str(s):
+    """Interns strings so equal ones share memory. Anything else is returned as is.
+
+    Keyword arguments:
+    s -- Value to intern
+
+    Returns:
+    Interned string, or the value given if it isn't a string
+    """
+
+    return sys.intern(s) if isinstance(s, str) else s
+
+
+def from_jobs(jobs):
+    """Turns jobs into records one at a time, so a generator of jobs like jobs_db.iter_jobs() is never held in full.
+
+    Keyword arguments:
+    jobs -- Iterable of jobs
+
+    Returns:
+    Generator of JobRecord of each job
+    """
+
+    return (JobRecord.from_job(j) for j in jobs)
@@ -2,29 +2,137 @@
 
 from my_secrets import api_key
 from serpapi import GoogleSearch
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from jobs_cache import CacheMissError
+import os
 import re
 
 
-def get_jobs(page_amt):
-    """Uses Serpapi to get results from Google Jobs
+# Fewer jobs than this are prepared in one process (see benchmarks/bench_jobs_results.py)
+PARALLEL_PREPARE_MIN_JOBS = 5000
+
+
+def get_jobs(page_amt, max_workers=4, search_class=GoogleSearch, cache=None):
+    """Uses Serpapi to get results from Google Jobs. Pages are fetched concurrently and returned in page order.
+    A page that fails to download is reported and skipped without losing the other pages.
 
     Keyword arguments:
-    page -- Amount of pages of results to be returned. Starts at 0
+    page_amt -- Amount of pages of results to be returned
+    max_workers -- Most pages to request at the same time. 1 fetches pages one after another.
+    search_class -- Serpapi search class used to make requests
+    cache -- jobs_cache.ResponseCache to serve pages from and store fetched pages in. None always makes requests.
 
     Returns:
-    List of dictionaries containing job listings
+    List of dictionaries containing job listings, without repeated job ids
     """
 
-    jobs = []
-    for p in range(page_amt):
-        jobs += GoogleSearch({
-            "engine": "google_jobs",
-            "q": "software developer",
-            "location": "Boston,Massachusetts",
-            "api_key": api_key,
-            "start": page_amt * p  # 10 results per page. Every 10 results is start of page.
-        }).get_dict()["jobs_results"]
+    pages, errors = fetch_pages([get_page_params(p) for p in range(page_amt)], max_workers, search_class, cache)
+    for p, e in errors:
+        print(f"Error getting page {p} of jobs results: {e}")
+
+    return dedupe_jobs(pages)
+
+
+def get_page_params(page):
+    """Gets Serpapi request parameters for a page of Google Jobs results.
+
+    Keyword arguments:
+    page -- Page of results to request. Starts at 0
+
+    Returns:
+    Dictionary of request parameters
+    """
+
+    return {
+        "engine": "google_jobs",
+        "q": "software developer",
+        "location": "Boston,Massachusetts",
+        "api_key": api_key,
+        "start": 10 * page  # 10 results per page. Every 10 results is start of page.
+    }
+
+
+def fetch_page(params, search_class=GoogleSearch):
+    """Requests a single page of results from Serpapi.
+
+    Keyword arguments:
+    params -- Serpapi request parameters
+    search_class -- Serpapi search class used to make the request
+
+    Returns:
+    List of dictionaries containing job listings of the page
+    """
+
+    # Serpapi adds its own entries to the dict it's given, so give it a copy to keep cache keys stable
+    results = search_class(dict(params)).get_dict()
+    if "error" in results:
+        raise RuntimeError(results["error"])
+    return results.get("jobs_results", [])
+
+
+def fetch_pages(params_list, max_workers=4, search_class=GoogleSearch, cache=None):
+    """Requests pages of results from Serpapi using a bounded pool of threads.
+    Pages found in the cache aren't requested, and requested pages are added to the cache.
+
+    Keyword arguments:
+    params_list -- List of Serpapi request parameters, one for each page
+    max_workers -- Most requests to have running at the same time
+    search_class -- Serpapi search class used to make requests
+    cache -- jobs_cache.ResponseCache of previous responses, or None
+
+    Returns:
+    (pages, errors) -- List of job listings of each page in the order given (empty list for failed pages), and
+                       list of tuples of the failed page's index and its exception
+    """
+
+    pages = [[] for _ in params_list]
+    errors = []
+
+    # Cache is only used from this thread. Worker threads just make requests.
+    to_fetch = []
+    for p, params in enumerate(params_list):
+        cached = cache.get(params) if cache else None
+        if cached is not None:
+            pages[p] = cached
+        elif cache and cache.cache_only:
+            errors.append((p, CacheMissError(f"Page isn't cached: {cache.get_key(params)}")))
+        else:
+            to_fetch.append(p)
 
+    if to_fetch:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {p: executor.submit(fetch_page, params_list[p], search_class) for p in to_fetch}
+            for p, future in futures.items():
+                try:
+                    pages[p] = future.result()
+                except Exception as e:
+                    errors.append((p, e))
+                    continue
+                if cache:
+                    cache.put(params_list[p], pages[p])
+
+    errors.sort(key=lambda e: e[0])
+    return pages, errors
+
+
+def dedupe_jobs(pages):
+    """Combines pages of job listings into one list, keeping only the first listing of each job id.
+
+    Keyword arguments:
+    pages -- List of lists of dictionaries containing job listings
+
+    Returns:
+    jobs -- List of dictionaries containing job listings
+    """
+
+    jobs = []
+    seen = set()
+    for page in pages:
+        for j in page:
+            if j.get("job_id") in seen:
+                continue
+            seen.add(j.get("job_id"))
+            jobs.append(j)
     return jobs
 
 
@@ -43,53 +151,86 @@ def store_jobs(jobs):
             file.write(str(j) + "\n")
 
 
-def prepare_jobs_for_db(jobs):
+def prepare_jobs_for_db(jobs, max_workers=None, chunk_size=500):
     """Based on the structure of data given by Serpapi, get the relevant data and return it for it to be used in the
     database. Serpapi data structure is a list of dictionaries with each dict being a job.
+    Large amounts of jobs are split into chunks that are prepared in separate processes. Small amounts are prepared
+    in this process, since starting processes and sending jobs to them takes longer than preparing the jobs.
 
     Keyword arguments:
     jobs -- List of dictionaries with each dict being a job
+    max_workers -- Most processes to prepare jobs in. None uses one for each CPU, 1 prepares every job in this process.
+    chunk_size -- Amount of jobs sent to a process at a time
 
     Returns:
-    prepared_jobs -- List of tuples of jobs with data structured for database
+    prepared_jobs -- List of tuples of jobs with data structured for database, in the order given
     """
 
-    prepared_jobs = []
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers <= 1 or len(jobs) < PARALLEL_PREPARE_MIN_JOBS:
+        return prepare_jobs_chunk(jobs)
 
-    for j in jobs:
-        # Get SQL data parameters for new table row
-        job_id = j["job_id"].strip()
-        title = j["title"].strip()
-        company_name = j["company_name"].strip()
-        location = j.get("location", "").strip()
-        description = j.get("description", "").strip()
-        posted_at = j["detected_extensions"].get("posted_at", "").strip()
-        salary = j["detected_extensions"].get("salary", "").strip()
-        work_from_home = j["detected_extensions"].get("work_from_home", "")
+    chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+        # map() gives results in the order of the chunks, whichever process finishes first
+        return [job for chunk in executor.map(prepare_jobs_chunk, chunks) for job in chunk]
 
-        # If work_from_home empty but location has "anywhere", the job is considered remote
-        if work_from_home == "" and j["location"].strip().lower() == "anywhere":
-            work_from_home = True
 
-        benefits = get_highlights_section(j["job_highlights"], "Benefits")
-        strip_str_in_list(benefits)
+def prepare_jobs_chunk(jobs):
+    """Prepares jobs for the database one after another. Runs in worker processes of prepare_jobs_for_db().
 
-        # If salary wasn't in assigned location, it might be in another location
-        if salary == "":
-            min_salary, max_salary = get_salary(benefits, j["description"])
-            salary = get_salary_format(min_salary, max_salary)
+    Keyword arguments:
+    jobs -- List of dictionaries with each dict being a job
 
-        # Get all links of current listing
-        links = [d.get("link") for d in j["related_links"]]
-        strip_str_in_list(links)
+    Returns:
+    List of tuples of jobs with data structured for database
+    """
 
-        qualifications = get_highlights_section(j["job_highlights"], "Qualifications")
-        strip_str_in_list(qualifications)
+    return [prepare_job(j) for j in jobs]
 
-        prepared_jobs += [(job_id, title, company_name, location, description, posted_at, salary,
-                           work_from_home, links, qualifications)]
 
-    return prepared_jobs
+def prepare_job(j):
+    """Gets the data of a single Serpapi job for the database.
+
+    Keyword arguments:
+    j -- Dictionary of a job
+
+    Returns:
+    Tuple of the job with data structured for database
+    """
+
+    # Get SQL data parameters for new table row
+    job_id = j["job_id"].strip()
+    title = j["title"].strip()
+    company_name = j["company_name"].strip()
+    location = j.get("location", "").strip()
+    description = j.get("description", "").strip()
+    posted_at = j["detected_extensions"].get("posted_at", "").strip()
+    salary = j["detected_extensions"].get("salary", "").strip()
+    work_from_home = j["detected_extensions"].get("work_from_home", "")
+
+    # If work_from_home empty but location has "anywhere", the job is considered remote
+    if work_from_home == "" and j["location"].strip().lower() == "anywhere":
+        work_from_home = True
+
+    sections = get_highlights_sections(j["job_highlights"])
+    benefits = sections.get("Benefits", "")
+    strip_str_in_list(benefits)
+
+    # If salary wasn't in assigned location, it might be in another location
+    if salary == "":
+        salary = get_salary_format(*(extract_salary(benefits, description) or (0, 0)))
+
+    # Get all links of current listing
+    links = [d.get("link") for d in j["related_links"]]
+    strip_str_in_list(links)
+
+    qualifications = sections.get("Qualifications", "")
+    strip_str_in_list(qualifications)
+
+    return (job_id, title, company_name, location, description, posted_at, salary, work_from_home, links,
+            qualifications)
 
 
 def strip_str_in_list(l):
@@ -97,69 +238,113 @@ def strip_str_in_list(l):
         l[i] = s.strip()
 
 
-def get_highlights_section(highlights, title):
-    """jobs_highlights has multiple indexed sets of items with titles. Titles are not guaranteed to stay in the same
-    order. Searches for given title and returns items under that title.
+def get_highlights_sections(highlights):
+    """Gets the items under every title of jobs_highlights in one pass, rather than searching it once for each title.
 
     Keyword arguments:
     highlights -- The "job_highlights" section from the Serpapi data
-    title -- The name the desired items are under
 
     Returns:
-    Items associated with the given title. If no such title, returns empty string.
+    Dictionary of items by title. If a title is repeated, the first items under it are kept.
     """
 
+    sections = {}
     for section in highlights:
-        if section.get("title") == title:
-            return section.get("items")
-    return ""
-
-
-def get_salary(benefits: dict, job_description: str):
-    """Looks for salary in multiple places.
+        sections.setdefault(section.get("title"), section.get("items"))
+    return sections
+
+
+# One pattern for everything the salary search looks for, so benefits and description are scanned in a single pass.
+# A match is either a word that says salary numbers are near (context) or an amount or range of amounts, with an
+# optional pay period after it like "an hour", "per year", "/yr" or "hourly".
+SALARY_EXTRACTION_PATTERN = re.compile(r"""
+    (?=[$\dspbcw])  # Every match starts with one of these, so other positions are skipped quickly
+    (?:(?P<context>salary|pay\s+range|pay\s+rate|base\s+pay|compensation|wage)
+  | (?:(?P<low_dollar>\$)\s*)?
+    (?<![\w.,])(?!401\(?k)  # 401(k) is a benefit, not 401 thousand
+    (?P<low>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)\s*(?P<low_k>k(?![a-z]))?
+    (?:\s*(?:-|–|—|to)\s*
+       (?P<high_dollar>\$)?\s*(?P<high>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)\s*(?P<high_k>k(?![a-z]))?)?
+    (?:\s*(?:(?:per|an?|/)\s*(?P<period>hour|hr|day|week|wk|month|mo|year|yr|annum)\b
+          |(?P<period_adverb>hourly|daily|weekly|monthly|yearly|annually)\b))?)
+""", re.VERBOSE | re.IGNORECASE)
+
+SALARY_PERIODS = {"hour": "hour", "hr": "hour", "hourly": "hour", "day": "day", "daily": "day", "week": "week",
+                  "wk": "week", "weekly": "week", "month": "month", "mo": "month", "monthly": "month", "year": "year",
+                  "yr": "year", "yearly": "year", "annum": "year", "annually": "year"}
+SALARY_PERIOD_NAMES = {"hour": "Hourly", "day": "Daily", "week": "Weekly", "month": "Monthly", "year": "Yearly"}
+
+# How far after a context word (like "salary") a bare number is still taken as the salary
+SALARY_CONTEXT_CHARS = 60
+# Bare numbers below this are taken as something else, like "5 years of experience"
+MIN_SALARY_AMOUNT = 7
+# Bare numbers like these are years ("Founded in 2015"), not salaries
+YEAR_PATTERN = re.compile(r"(?:19|20)\d\d")
+# Bare numbers with at least this many digits before the decimal point are taken as yearly salaries
+MIN_BARE_SALARY_DIGITS = 5
+
+
+def extract_salary(benefits, job_description):
+    """Finds the salary of a job in its benefits, then its description, in one pass over both.
+    Amounts with a dollar sign, "K" or a pay period ($120K–$150K, 25-30 an hour, $90,000 per year) are always taken.
+    Bare numbers are only taken shortly after a word like "salary" or "pay range", or as a range in the benefits. Even
+    then they must be a range or clearly a salary (85,000 or 120000), and never a year like 2015.
 
     Keyword arguments:
-    benefits -- Data from 'Benefits' section of Serpapi data
-    job_description -- 'job_description" section of Serpapi data
+    benefits -- Items of the 'Benefits' section of Serpapi data
+    job_description -- 'description' section of Serpapi data
 
     Returns:
-    (min_salary, max_salary) -- Tuple of the salary range
+    (min_salary, max_salary, period) -- Floats of the salary range and its pay period ("hour", "day", "week",
+                                        "month" or "year"). None if no salary was found.
     """
 
-    # Code provided by professor with student modifications
-    min_salary = 0
-    max_salary = 0
-    for item in benefits:
-        if 'range' in item.lower():
-            # from https://stackoverflow.com/questions/63714217/how-can-i-extract-numbers-containing-commas-from
-            # -strings-in-python
-            numbers = re.findall(r'\b\d{1,3}(?:,\d{3})*(?:\.\d+)?(?!\d)', item)
-            if numbers:  # if we found salary data, return it
-                return float(numbers[0].replace(',', '')), float(numbers[1].replace(',', ''))
-        numbers = re.findall(r'\b\d{1,3}(?:,\d{3})*(?:\.\d+)?(?!\d)', item)
-        if len(numbers) == 2 and int(
-                # some jobs just put the numbers in one item and the description in another
-                numbers[0].replace(',', '')) > 30:
-            return float(numbers[0].replace(',', '')), float(numbers[1].replace(',', ''))
-        else:
-            return min_salary, max_salary
-    location = job_description.find("salary range")
-    if location < 0:
-        location = job_description.find("pay range")
-    if location < 0:
-        return min_salary, max_salary
-    numbers = re.findall(r'\b\d{1,3}(?:,\d{3})*(?:\.\d+)?(?!\d)', job_description[location:location + 50])
-    if numbers:
-        return float(numbers[0].replace(',', '')), float(numbers[1].replace(',', ''))
-    return min_salary, max_salary
-
-
-def get_salary_format(min_salary, max_salary):
+    text = "\n".join(benefits)
+    benefits_end = len(text)
+    text += "\n" + (job_description or "")
+
+    context_end = None
+    for match in SALARY_EXTRACTION_PATTERN.finditer(text):
+        context, low_dollar, low, low_k, high_dollar, high, high_k, period, period_adverb = match.groups()
+        if context:
+            context_end = match.end()
+            continue
+
+        # Cheap checks first, most numbers in a description aren't salaries
+        period = SALARY_PERIODS.get((period or period_adverb or "").lower())
+        is_marked = low_dollar or high_dollar or low_k or high_k or period
+        near_context = context_end is not None and match.start() - context_end <= SALARY_CONTEXT_CHARS
+        # Some jobs just put the numbers in one benefit item and what they are in another
+        in_benefits = match.start() < benefits_end and high
+        if not (is_marked or near_context or in_benefits):
+            continue
+        # Headcounts and years near a context word are common ("Salary: DOE. Join our team of 250 engineers")
+        if not is_marked:
+            if YEAR_PATTERN.fullmatch(low) or (high and YEAR_PATTERN.fullmatch(high)):
+                continue
+            if not (high or "," in low or len(low.partition(".")[0]) >= MIN_BARE_SALARY_DIGITS):
+                continue
+
+        # "120-150K" means both ends are in thousands
+        thousands = 1000 if low_k or high_k else 1
+        min_salary = float(low.replace(",", "")) * thousands
+        max_salary = max(float(high.replace(",", "")) * thousands, min_salary) if high else min_salary
+        if min_salary < MIN_SALARY_AMOUNT or not (is_marked or near_context or min_salary > 30):
+            continue
+
+        if period is None:
+            period = "year" if thousands > 1 or min_salary >= 900 else "hour"
+        return min_salary, max_salary, period
+    return None
+
+
+def get_salary_format(min_salary, max_salary, period=None):
     """Gets salary range and forms a string.
 
     Keyword arguments:
     min_salary -- low end of salary range
     max_salary -- high end of salary range
+    period -- pay period of the range ("hour", "day", "week", "month" or "year"). Guessed from min_salary if None.
 
     Returns:
     salary -- Worded version of salary range
@@ -170,7 +355,9 @@ def get_salary_format(min_salary, max_salary):
         salary = f"{min_salary} - {max_salary}"
 
     salary_time_period = 'N/A'
-    if 0 < min_salary < 900:
+    if period is not None and min_salary > 0:
+        salary_time_period = SALARY_PERIOD_NAMES[period]
+    elif 0 < min_salary < 900:
         salary_time_period = 'Hourly'
     elif min_salary > 0:
         salary_time_period = "Yearly"
@@ -0,0 +1,39 @@
+"""Module for turning whole columns of salaries into yearly salary ranges at once with NumPy."""
+
+import numpy as np
+from jobs_filtering import get_yearly_salary_range
+
+
+def yearly_salary_arrays(salaries):
+    """Reads a column of salary strings as yearly ranges, the same as jobs_filtering.get_yearly_salary_range().
+    Salaries repeat a lot (the same few formats and amounts show up across many jobs), so each different salary is
+    only parsed once and its range is spread to every job that has it with NumPy.
+
+    Keyword arguments:
+    salaries -- Sequence of salary strings like "100K - 120K", "60 hourly" or "25–30 an hour"
+
+    Returns:
+    (min_salaries, max_salaries) -- NumPy float arrays of yearly salary ranges. NaN where there's no salary.
+    """
+
+    # Number for each salary of which different salary it is
+    codes = {}
+    inverse = np.fromiter((codes.setdefault(s, len(codes)) for s in salaries), dtype=np.intp, count=len(salaries))
+
+    ranges = np.array([get_yearly_salary_range(s) for s in codes], dtype=np.float64).reshape(-1, 2)
+    return ranges[inverse, 0], ranges[inverse, 1]
+
+
+def to_db_values(min_salaries, max_salaries):
+    """Turns yearly salary arrays into rows of values for the database, with None for no salary.
+
+    Keyword arguments:
+    min_salaries -- NumPy float array of low ends of yearly salaries
+    max_salaries -- NumPy float array of high ends of yearly salaries
+
+    Returns:
+    List of (min_salary, max_salary) tuples
+    """
+
+    return [(None if np.isnan(low) else float(low), None if np.isnan(high) else float(high))
+            for low, high in zip(min_salaries.tolist(), max_salaries.tolist())]
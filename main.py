@@ -1,8 +1,12 @@
 """Gets job data and stores it in a database. Displays GUI to view job info."""
 
+import jobs_cache
 import jobs_db
 import jobs_results
 import jobs_excel
+import jobs_geocoding
+import jobs_records
+import itertools
 import sys
 from PySide6.QtWidgets import QApplication
 from mainwindow import MainWindow
@@ -10,19 +14,44 @@ from mainwindow import MainWindow
 
 def get_job_data():
     """Gather jobs from Serpapi and Excel file, format the data for the database to take.
+    Excel file is only parsed when it has changed since the last run. Either way, its jobs are read a chunk at a
+    time as they're consumed.
 
     Keyword arguments:
     None
 
     Returns:
-    jobs -- Combination of results from Serpapi and records from Excel file
+    jobs -- Iterator of the combination of results from Serpapi and records from Excel file
     """
 
-    jobs = jobs_results.get_jobs(5)
+    cache = jobs_cache.ResponseCache("serpapi_cache.sqlite")
+    jobs = jobs_results.get_jobs(5, cache=cache)
+    cache.close()
     jobs_results.store_jobs(jobs)
     jobs = jobs_results.prepare_jobs_for_db(jobs)
-    jobs += jobs_excel.get_jobs("Sprint3Data.xlsx")
-    return jobs
+    return itertools.chain(jobs, jobs_excel.iter_cached_jobs("Sprint3Data.xlsx", "Sprint3Data.snapshot"))
+
+
+def geocode_job_locations(cursor, gazetteer):
+    """Stores coordinates of jobs that don't have them yet, so the map doesn't have to look them up.
+    Only US cities and ZIP codes (from the bundled gazetteer) and locations in the geocode cache are used, so this
+    never waits on the network. The map looks up the rest with Nominatim in the background, and caches them for
+    next time. The gazetteer is only read when there are jobs it hasn't been asked about yet.
+
+    Keyword arguments:
+    cursor -- Cursor of the jobs database
+    gazetteer -- jobs_geocoding.GazetteerGeocoder, shared with the map so the file is read at most once
+
+    Returns:
+    summary -- Dictionary of amounts of "located" and "not found" jobs
+    """
+
+    cache = jobs_geocoding.GeocodeCache("geocode_cache.sqlite")
+    cache.evict()
+    try:
+        return jobs_db.geocode_jobs(cursor, None, cache, gazetteer)
+    finally:
+        cache.close()
 
 
 def main():
@@ -31,15 +60,20 @@ def main():
     # Store job data
     conn, cursor = jobs_db.open_db("jobs_db.sqlite")
     jobs_db.setup_db(cursor)
-    jobs_db.insert_jobs(cursor, jobs)
+    summary = jobs_db.ingest_jobs(cursor, jobs)
+    print(f"Jobs stored: {summary['new']} new, {summary['changed']} changed, {summary['unchanged']} unchanged.")
+    del jobs  # Window reads jobs back from the database, so don't hold on to a second copy
+    gazetteer = jobs_geocoding.GazetteerGeocoder()
+    summary = geocode_job_locations(cursor, gazetteer)
+    print(f"Job locations: {summary['located']} located, {summary['not found']} left for the map to look up.")
 
-    # Get database records for GUI
-    job_records = jobs_db.get_jobs(cursor)
+    # Database records for GUI are read in batches and kept as compact records as the window takes them
+    job_records = jobs_records.from_jobs(jobs_db.iter_jobs(cursor))
 
     # Start GUI
     app = QApplication(sys.argv)
     app.aboutToQuit.connect(lambda: jobs_db.close_db(conn))
-    window = MainWindow(job_records)
+    window = MainWindow(job_records, cursor, live_filter=True, offline_geocoder=gazetteer)
     window.show()
     sys.exit(app.exec())
 
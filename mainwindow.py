@@ -2,15 +2,35 @@
 A map may also be displayed to show the locations of jobs."""
 
 import re
+from PySide6.QtCore import QThreadPool, QTimer
 from PySide6.QtGui import Qt
 from PySide6.QtWidgets import QWidget
 from mapwindow import MapWindow
 from ui_mainwindow import Ui_MainWindow
+from joblistmodel import JobListModel
+from filterworker import FilterWorker
+import jobs_db
 import jobs_filtering
 
 
+# Milliseconds to wait after the last key press before live filtering
+LIVE_FILTER_DELAY_MS = 300
+
+
 class MainWindow(QWidget):
-    def __init__(self, jobs):
+    def __init__(self, jobs, cursor=None, live_filter=False, offline_geocoder=None):
+        """Sets up the window with the jobs to display.
+
+        Keyword arguments:
+        jobs -- Iterable of jobs, such as jobs_db.iter_jobs(). It's read once.
+        cursor -- Cursor of the database the jobs are from, used to search it. None filters only in memory.
+        live_filter -- Filter as the user types a keyword, rather than only when filters are applied
+        offline_geocoder -- jobs_geocoding.Geocoder the map tries before Nominatim. None uses the bundled US gazetteer.
+
+        Returns:
+        None
+        """
+
         # Setup UI
         super().__init__()
         self.ui = Ui_MainWindow()
@@ -18,16 +38,22 @@ class MainWindow(QWidget):
 
         # Init jobs
         self.map_displayed = False
-        self.JOBS = jobs
-        self.filtered_jobs = self.JOBS
-        self.list_jobs()
-        self.ui.jobs_listWidget.selectionModel().currentChanged.connect(self.job_selected)
+        self.cursor = cursor
+        # Filtering runs in a thread pool, which can't use this window's cursor, so it opens the file itself
+        self.db_filename = jobs_db.get_db_filename(cursor) if cursor else None
+        self.filter_cache = jobs_filtering.FilterCache()
+        self.filter_generation = 0
+        self.filter_worker = None
+        self.job_model = JobListModel(parent=self)
+        self.ui.jobs_listView.setModel(self.job_model)
+        self.set_jobs(jobs)
+        self.ui.jobs_listView.selectionModel().currentChanged.connect(self.job_selected)
 
         # Init deselect button
         self.ui.deselect_pushButton.clicked.connect(self.deselect_job)
 
         # Init map
-        self.jobs_map = MapWindow([])
+        self.jobs_map = MapWindow([], offline_geocoder=offline_geocoder)
         self.jobs_map.windowClosed.connect(self.map_window_closed)
         self.ui.map_pushButton.clicked.connect(self.display_map)
 
@@ -36,26 +62,53 @@ class MainWindow(QWidget):
         self.insert_city_locations()
         self.ui.filter_gridLayout.setAlignment(self.ui.applyFilters_pushButton, Qt.AlignmentFlag.AlignRight)
 
-    def list_jobs(self):
-        """Re-fills list widget (that hosts jobs for the user to select) with the currently selected jobs
-        or all jobs if it's called as the window is created.
+        # Init live filter. Timer restarts on every key press, so filtering only starts once the user stops typing.
+        self.live_filter_timer = QTimer(self)
+        self.live_filter_timer.setSingleShot(True)
+        self.live_filter_timer.setInterval(LIVE_FILTER_DELAY_MS)
+        self.live_filter_timer.timeout.connect(self.filter_jobs)
+        self.live_filter = live_filter
+        self.ui.keywordFilter_plainTextEdit.textChanged.connect(self.keyword_changed)
+
+    def set_jobs(self, jobs):
+        """Replaces all jobs of the window and lists them. Search text of the jobs is built once here, so filtering
+        doesn't have to build it again until the jobs change. Cached filter results are of the old jobs, so they're
+        removed.
 
         Keyword arguments:
-        None
+        jobs -- Iterable of jobs
 
         Returns:
         None
         """
 
-        # Don't append to previous existing list
-        self.ui.jobs_listWidget.clear()
+        self.cancel_filtering()
+        self.JOBS = list(jobs)
+        self.search_corpus = jobs_filtering.build_search_corpus(self.JOBS)
+        self.filter_cache.clear()
+        self.job_model.set_jobs(self.JOBS)
+        self.list_jobs(range(len(self.JOBS)))
 
-        for j in self.filtered_jobs:
-            job_str = f"{j[1]}\n{j[2]}"  # Get title and company as text
-            self.ui.jobs_listWidget.addItem(job_str)
+    def list_jobs(self, indexes):
+        """Lists the jobs at the given positions (that host jobs for the user to select), such as the filtered jobs
+        or all jobs as the window is created. The list only makes the text of the rows it shows.
+
+        Keyword arguments:
+        indexes -- Positions in self.JOBS of jobs to list
+
+        Returns:
+        None
+        """
+
+        self.job_model.set_indexes(indexes)
 
         # Display amount of jobs
-        self.ui.resultsAmt_label.setText(str(len(self.filtered_jobs)))
+        self.ui.resultsAmt_label.setText(str(len(indexes)))
+
+    @property
+    def filtered_jobs(self):
+        """Jobs currently listed, in the order they're listed."""
+        return self.job_model.get_jobs()
 
     def job_selected(self, current, previous):
         """Clicked event for list item being selected in list to display jobs.
@@ -79,11 +132,11 @@ class MainWindow(QWidget):
             return
 
         # Fill boxes with data of selected job
-        self.set_job_fields(self.filtered_jobs[current.row()])
+        self.set_job_fields(self.job_model.get_job(current.row()))
 
-        # Remove multiple odd behaviors related to user clicking on list widget
-        self.ui.jobs_listWidget.setFocus(Qt.FocusReason.MouseFocusReason)
-        self.ui.jobs_listWidget.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        # Remove multiple odd behaviors related to user clicking on job list
+        self.ui.jobs_listView.setFocus(Qt.FocusReason.MouseFocusReason)
+        self.ui.jobs_listView.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
 
     def deselect_job(self):
         """Removes the focus on a job in the job-list, and removes the selected job data being displayed.
@@ -96,12 +149,12 @@ class MainWindow(QWidget):
         """
 
         # Remove the focus of the selected job
-        self.ui.jobs_listWidget.clearSelection()
+        self.ui.jobs_listView.clearSelection()
         self.clear_job_fields()
         self.clear_placeholders()
 
-        # Remove multiple odd behaviors related to user clicking on list widget
-        self.ui.jobs_listWidget.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        # Remove multiple odd behaviors related to user clicking on job list
+        self.ui.jobs_listView.setFocusPolicy(Qt.FocusPolicy.NoFocus)
 
     def set_placeholders(self):
         """Change the placeholder text of the boxes holding selected job data to the default text for that field.
@@ -184,6 +237,19 @@ class MainWindow(QWidget):
         self.ui.links_plainTextEdit.setPlainText("")
         self.ui.qualifications_plainTextEdit.setPlainText("")
 
+    def keyword_changed(self):
+        """Text changed event of the keyword filter. With live filter on, jobs are filtered once the user stops typing.
+
+        Keyword arguments:
+        None
+
+        Returns:
+        None
+        """
+
+        if self.live_filter:
+            self.live_filter_timer.start()
+
     def filter_jobs(self):
         """Clicked event for when user applies filters.
         Filter jobs in list and what's displayed on list and map.
@@ -192,6 +258,9 @@ class MainWindow(QWidget):
             Minimum salary (spinbox): Filter jobs to only get what's at or above given yearly salary number.
             Keyword (textedit): Search all job data to find whether it contains a string.
             Location (combobox): Filter jobs based on a city. User selects from available cities from jobs.
+        Cached results are shown right away. Otherwise, filtering runs in a thread pool (see
+        filterworker.filter_indexes() for how filters are applied) and the result is shown by show_filtered_jobs().
+        Filtering that's still running from an earlier request is cancelled.
 
         Keyword arguments:
         None
@@ -200,21 +269,58 @@ class MainWindow(QWidget):
         None
         """
 
-        self.filtered_jobs = self.JOBS
-
         remote_checked = self.ui.remoteFilter_checkBox.isChecked()
-        self.filtered_jobs = jobs_filtering.filter_remote(self.filtered_jobs, remote_checked)
-
         user_min_salary = int(self.ui.salaryFilter_spinBox.value())
-        self.filtered_jobs = jobs_filtering.filter_min_salary(self.filtered_jobs, user_min_salary)
-
         keyword = self.ui.keywordFilter_plainTextEdit.toPlainText()
-        self.filtered_jobs = jobs_filtering.filter_keyword(self.filtered_jobs, keyword)
-
         user_city = self.ui.locationFilter_comboBox.currentText()
-        self.filtered_jobs = jobs_filtering.filter_city_location(self.filtered_jobs, user_city)
+        filters = (remote_checked, user_min_salary, keyword, user_city)
+
+        self.cancel_filtering()
+        self.live_filter_timer.stop()
+
+        indexes = self.filter_cache.get(filters)
+        if indexes is not None:
+            self.show_filtered_jobs(self.filter_generation, filters, indexes)
+            return
+
+        self.filter_worker = FilterWorker(self.filter_generation, self.JOBS, self.search_corpus, filters,
+                                          self.filter_cache.get_broader(filters), self.db_filename)
+        self.filter_worker.signals.finished.connect(self.show_filtered_jobs)
+        QThreadPool.globalInstance().start(self.filter_worker)
+
+    def cancel_filtering(self):
+        """Cancels filtering that's still running, and makes sure its result is never shown.
+
+        Keyword arguments:
+        None
+
+        Returns:
+        None
+        """
+
+        self.filter_generation += 1
+        if self.filter_worker is not None:
+            self.filter_worker.cancel()
+            self.filter_worker = None
+
+    def show_filtered_jobs(self, generation, filters, indexes):
+        """Lists filtered jobs, and shows them on the map if it's open. Results of old filter requests are ignored.
+
+        Keyword arguments:
+        generation -- Number of the filter request the result is of
+        filters -- tuple of (remote_checked, user_min_salary, keyword, user_city)
+        indexes -- Positions in self.JOBS of matching jobs
+
+        Returns:
+        None
+        """
+
+        if generation != self.filter_generation:
+            return
+        self.filter_worker = None
+        self.filter_cache.put(filters, indexes)
 
-        self.list_jobs()
+        self.list_jobs(indexes)
         if self.map_displayed:
             self.update_map()
         self.deselect_job()
@@ -269,7 +375,10 @@ class MainWindow(QWidget):
         None
         """
 
-        jobs_to_display = jobs_filtering.format_jobs_for_map(self.filtered_jobs)
+        jobs = self.filtered_jobs
+        # Coordinates were stored when the jobs were ingested, so most jobs don't need geocoding
+        coordinates = jobs_db.get_job_coordinates(self.cursor, [j[0] for j in jobs]) if self.cursor else None
+        jobs_to_display = jobs_filtering.format_jobs_for_map(jobs, coordinates)
         self.jobs_map.add_locations(jobs_to_display)
 
     def map_window_closed(self):
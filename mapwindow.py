@@ -2,19 +2,38 @@
 
 import io
 
-from PySide6.QtCore import Signal
-from PySide6.QtWidgets import QWidget, QVBoxLayout
+from PySide6.QtCore import QThreadPool, QTimer, Signal
+from PySide6.QtWidgets import QProgressBar, QWidget, QVBoxLayout
 from PySide6.QtWebEngineWidgets import QWebEngineView
 import folium
 from geopy.geocoders import Nominatim
 from folium.plugins import MarkerCluster
-from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
+import jobs_geocoding
+import jobs_map
+from geocodeworker import GeocodeWorker
+
+
+# Most often markers are sent to the map page while locations are being geocoded
+REFRESH_INTERVAL_MS = 250
 
 
 class MapWindow(QWidget):
     windowClosed = Signal()
 
-    def __init__(self, jobs):
+    def __init__(self, jobs, geocode_cache_filename="geocode_cache.sqlite", requests_per_second=1.0,
+                 offline_geocoder=None):
+        """Sets up the window and marks jobs on the map.
+
+        Keyword arguments:
+        jobs -- job data (id, title, company, location), optionally followed by stored (latitude, longitude) or None
+        geocode_cache_filename -- SQLite file coordinates of locations are kept in across runs
+        requests_per_second -- Most requests to make to the geocoder each second (Nominatim allows 1)
+        offline_geocoder -- jobs_geocoding.Geocoder tried before Nominatim. None uses the bundled US gazetteer.
+
+        Returns:
+        None
+        """
+
         super().__init__()
 
         self.map_data_markers = None
@@ -22,7 +41,32 @@ class MapWindow(QWidget):
         self.geolocator = None
         self.web_view = QWebEngineView()
         self.in_memory_file = None
-        self.geocode_cache = {}
+        # Markers wanted on the map, and markers the page has, by job id: (latitude, longitude, popup)
+        self.markers = {}
+        self.shown_markers = {}
+        # Markers can only be sent once the page has loaded
+        self.page_loaded = False
+        self.web_view.loadFinished.connect(self.page_finished_loading)
+        # Most locations are US cities found offline. Nominatim is only asked about the rest.
+        self.offline_geocoder = offline_geocoder or jobs_geocoding.GazetteerGeocoder()
+        self.geocode_cache_filename = geocode_cache_filename
+        self.geocode_cache = jobs_geocoding.GeocodeCache(geocode_cache_filename)
+        self.geocode_cache.evict()
+
+        # Locations not in the cache are geocoded in the background, one at a time. Every worker waits on the same
+        # rate limiter, so the limit holds even when a new set of locations replaces one that's still being geocoded.
+        self.rate_limiter = jobs_geocoding.RateLimiter(requests_per_second)
+        self.geocode_pool = QThreadPool(self)
+        self.geocode_pool.setMaxThreadCount(1)
+        self.geocode_generation = 0
+        self.geocode_worker = None
+        self.pending_jobs = {}
+
+        # Markers of newly geocoded locations are sent together, rather than one location at a time
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(REFRESH_INTERVAL_MS)
+        self.refresh_timer.timeout.connect(self.update_markers)
 
         self.setWindowTitle("Jobs Displayed on Map")
         self.window_width = 500
@@ -30,9 +74,16 @@ class MapWindow(QWidget):
         self.layout = QVBoxLayout(self)
         self.setLayout(self.layout)
 
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFormat("Locating jobs: %v / %m")
+        self.progress_bar.hide()
+
+        # The page is only rendered once. Markers are added and removed on it after that.
         self.init_map()
+        self.refresh_map()
         self.add_locations(jobs)
 
+        self.layout.addWidget(self.progress_bar)
         self.layout.addWidget(self.web_view)
 
     def init_map(self):
@@ -52,10 +103,12 @@ class MapWindow(QWidget):
             zoom_start=4,
             location=coordinate
         )
-        self.map_data_markers = MarkerCluster().add_to(self.jobs_map)
+        self.map_data_markers = MarkerCluster(options={"chunkedLoading": True}).add_to(self.jobs_map)
+        script = jobs_map.get_marker_script(self.map_data_markers.get_name())
+        self.jobs_map.get_root().script.add_child(folium.Element(script))
 
     def refresh_map(self):
-        """Displays new markers added.
+        """Renders the map page again. Its markers are sent again once it has loaded.
 
         Keyword arguments:
         None
@@ -64,63 +117,193 @@ class MapWindow(QWidget):
         None
         """
 
+        self.page_loaded = False
+        self.shown_markers = {}
         self.in_memory_file = io.BytesIO()
         self.jobs_map.save(self.in_memory_file, close_file=False)
         self.web_view.setHtml(self.in_memory_file.getvalue().decode())
 
+    def page_finished_loading(self, ok):
+        """Sends the markers to the map page once it has loaded.
+
+        Keyword arguments:
+        ok -- Whether the page loaded
+
+        Returns:
+        None
+        """
+
+        self.page_loaded = ok
+        if ok:
+            self.update_markers()
+
+    def update_markers(self):
+        """Sends the markers added and removed since the last update to the map page.
+
+        Keyword arguments:
+        None
+
+        Returns:
+        None
+        """
+
+        self.refresh_timer.stop()
+        if not self.page_loaded:
+            return
+
+        added, removed = jobs_map.get_marker_delta(self.shown_markers, self.markers)
+        if added or removed:
+            self.web_view.page().runJavaScript(jobs_map.get_update_script(added, removed))
+        self.shown_markers = dict(self.markers)
+
     def add_locations(self, jobs):
-        """Adds new markers of job locations on map.
+        """Replaces the markers on the map with markers of job locations.
+        Jobs with coordinates stored in the database, and locations found offline or with cached coordinates, are
+        shown right away. The rest are geocoded in the background and added as their coordinates come in. Only
+        markers of jobs that weren't already shown are sent to the map page, along with ids of jobs to remove.
 
         Keyword arguments:
-        jobs -- job data (id, title, company, location)
+        jobs -- job data (id, title, company, location), optionally followed by stored (latitude, longitude) or None
 
         Returns:
         None
         """
 
-        # Remove all markers on map (since markers can't be removed)
-        self.clear()
+        self.cancel_geocoding()
+        self.markers = {}
 
-        for job_id, title, company, location in jobs:
-            # Get coordinates of location
-            job_loc_geocoded = self.geocode_location(location)
-            if not job_loc_geocoded:
-                continue
+        for job in jobs:
+            coordinates = job[4] if len(job) > 4 else None
+            if coordinates is None:
+                coordinates = (jobs_geocoding.get_known_coordinates(job[3], self.geocode_cache, self.offline_geocoder)
+                               if job[3] else (None, None))
+            if coordinates is None:
+                self.pending_jobs.setdefault(job[3], []).append(job)
+            elif coordinates[0] is not None:
+                self.add_marker(job, coordinates)
 
-            # Add location to map
-            marker = folium.Marker(
-                location=[job_loc_geocoded.latitude, job_loc_geocoded.longitude],
-                popup=f"{title}\n\n{company}"
-            )
-            marker.add_to(self.map_data_markers)
-            marker.job_id = job_id
+        self.update_markers()
+        if self.pending_jobs:
+            self.start_geocoding(list(self.pending_jobs))
 
-        self.refresh_map()
+    def add_marker(self, job, coordinates):
+        """Adds marker of a job to the map. It's shown the next time markers are updated.
 
-    def geocode_location(self, location):
-        """Gets coordinates of location.
+        Keyword arguments:
+        job -- job data (id, title, company, location)
+        coordinates -- (latitude, longitude) of the job's location
+
+        Returns:
+        None
+        """
+
+        job_id, title, company = job[:3]
+        self.markers[job_id] = (coordinates[0], coordinates[1], jobs_map.get_popup(title, company))
+
+    def start_geocoding(self, locations):
+        """Geocodes locations in the background and shows progress while it runs.
+
+        Keyword arguments:
+        locations -- Location strings, each only once
+
+        Returns:
+        None
+        """
+
+        self.geocode_worker = GeocodeWorker(self.geocode_generation, locations, self.geolocator,
+                                            self.geocode_cache_filename, self.rate_limiter)
+        self.geocode_worker.signals.located.connect(self.location_geocoded)
+        self.geocode_worker.signals.progress.connect(self.geocoding_progress)
+        self.geocode_worker.signals.finished.connect(self.geocoding_finished)
+
+        self.progress_bar.setRange(0, len(locations))
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.geocode_pool.start(self.geocode_worker)
+
+    def cancel_geocoding(self):
+        """Stops geocoding that's still running, and makes sure its results are never shown.
 
         Keyword arguments:
+        None
+
+        Returns:
+        None
+        """
+
+        self.geocode_generation += 1
+        if self.geocode_worker is not None:
+            self.geocode_worker.cancel()
+            self.geocode_worker = None
+        self.pending_jobs = {}
+        self.refresh_timer.stop()
+        self.progress_bar.hide()
+
+    def location_geocoded(self, generation, location, coordinates):
+        """Adds markers of the jobs at a location once it's been geocoded.
+
+        Keyword arguments:
+        generation -- Number of the geocoding request the result is of
         location -- Location string
+        coordinates -- (latitude, longitude) of location, or None if it couldn't be found
+
+        Returns:
+        None
+        """
+
+        if generation != self.geocode_generation:
+            return
+
+        for job in self.pending_jobs.pop(location, []):
+            if coordinates:
+                self.add_marker(job, coordinates)
+        if coordinates and not self.refresh_timer.isActive():
+            self.refresh_timer.start()
+
+    def geocoding_progress(self, generation, done, total):
+        """Shows how many locations have been geocoded.
+
+        Keyword arguments:
+        generation -- Number of the geocoding request the progress is of
+        done -- Amount of locations geocoded
+        total -- Amount of locations to geocode
 
         Returns:
-        Location coordinates
+        None
         """
 
-        # Don't query for coordinates if already done so before
-        if location in self.geocode_cache:
-            return self.geocode_cache[location]
+        if generation == self.geocode_generation:
+            self.progress_bar.setValue(done)
 
-        try:
-            # Get coordinates of location
-            job_loc_geocoded = self.geolocator.geocode(location)
-            if job_loc_geocoded:
-                self.geocode_cache[location] = job_loc_geocoded
-                return job_loc_geocoded
-        except (GeocoderTimedOut, GeocoderUnavailable):
-            print(f"Geocoding failed for location: {location}")
+    def geocoding_finished(self, generation):
+        """Shows the last markers once every location has been geocoded.
 
-        return None
+        Keyword arguments:
+        generation -- Number of the geocoding request that finished
+
+        Returns:
+        None
+        """
+
+        if generation != self.geocode_generation:
+            return
+
+        self.geocode_worker = None
+        self.update_markers()
+        self.progress_bar.hide()
+
+    def geocode_location(self, location):
+        """Gets coordinates of location. Locations in the offline gazetteer or looked up before, in this run or
+        earlier ones, are found without asking the geocoder.
+
+        Keyword arguments:
+        location -- Location string
+
+        Returns:
+        (latitude, longitude) of location, or None if it couldn't be found
+        """
+
+        return jobs_geocoding.geocode_location(location, self.geolocator, self.geocode_cache, self.offline_geocoder)
 
     def closeEvent(self, event):
         """Event of window closing.
@@ -132,11 +315,12 @@ class MapWindow(QWidget):
         None
         """
 
+        self.cancel_geocoding()
         self.windowClosed.emit()
         event.accept()
 
     def clear(self):
-        """Re-build map so it has no markers.
+        """Removes every marker from the map.
 
         Keyword arguments:
         None
@@ -145,5 +329,6 @@ class MapWindow(QWidget):
         None
         """
 
-        self.init_map()
-        self.refresh_map()
+        self.cancel_geocoding()
+        self.markers = {}
+        self.update_markers()
@@ -2,6 +2,11 @@
 
 import pytest
 import os
+import http.server
+import json
+import threading
+import time
+import urllib.parse
 
 
 @pytest.fixture(scope="session")
@@ -9,3 +14,83 @@ def excel_file_path():
     """Tests are in subdirectory. Let them read Excel file from parent directory."""
     base_dir = os.path.dirname(os.path.realpath(__file__))
     return os.path.join(base_dir, '..', 'Sprint3Data.xlsx')
+
+
+@pytest.fixture(scope="session")
+def gazetteer():
+    """Offline geocoder over the bundled gazetteer file. Loaded once for all tests."""
+    import jobs_geocoding
+    geocoder = jobs_geocoding.GazetteerGeocoder()
+    geocoder.load()
+    return geocoder
+
+
+@pytest.fixture
+def serpapi_server():
+    """Local stand-in for the Serpapi endpoint. Each page takes a moment to respond, and pages whose start is in
+    'failing_starts' respond with an error. Yields a search class that sends its requests to the stand-in."""
+    from serpapi import GoogleSearch
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        latency = 0.2
+        failing_starts = set()
+
+        def do_GET(self):
+            query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+            start = int(query.get("start", ["0"])[0])
+            time.sleep(self.latency)
+
+            if start in self.failing_starts:
+                self.send_response(500)
+                body = {"error": f"Page starting at {start} failed"}
+            else:
+                self.send_response(200)
+                # Neighbouring pages share a listing so repeated jobs can be tested
+                body = {"jobs_results": [{"job_id": str(start + i), "title": f"Job {start + i}"} for i in range(11)]}
+
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(json.dumps(body).encode())
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    class LocalSearch(GoogleSearch):
+        BACKEND = f"http://127.0.0.1:{server.server_address[1]}"
+        handler = Handler
+
+    yield LocalSearch
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def stand_in_geocoder():
+    """Stand-in for a geopy geocoder. Answers from a dict of location to (latitude, longitude) instead of the
+    network, raises a timeout for locations in 'failing', and counts how often it's asked."""
+    from geopy.exc import GeocoderTimedOut
+
+    class Location:
+        def __init__(self, latitude, longitude):
+            self.latitude = latitude
+            self.longitude = longitude
+
+    class StandInGeocoder:
+        def __init__(self, locations, failing=()):
+            self.locations = locations
+            self.failing = failing
+            self.calls = 0
+
+        def geocode(self, location):
+            self.calls += 1
+            if location in self.failing:
+                raise GeocoderTimedOut()
+            coordinates = self.locations.get(location)
+            return Location(*coordinates) if coordinates else None
+
+    return StandInGeocoder
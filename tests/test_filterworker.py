@@ -0,0 +1,72 @@
+"""Testing functions in filterworker.py."""
+
+import pytest
+import filterworker
+import jobs_db
+import jobs_excel
+import jobs_filtering
+
+
+@pytest.fixture
+def db_jobs(tmp_path, excel_file_path):
+    """Excel jobs stored in a database file, as they're read back for MainWindow."""
+    db_filename = tmp_path / "jobs.sqlite"
+    connection, cursor = jobs_db.open_db(db_filename)
+    jobs_db.setup_db(cursor)
+    jobs_db.ingest_jobs(cursor, jobs_excel.get_jobs(excel_file_path))
+    jobs = jobs_db.get_jobs(cursor)
+    yield db_filename, cursor, jobs
+    jobs_db.close_db(connection)
+
+
+def test_filter_indexes(db_jobs):
+    """Tests filtering in memory, over the database and from a broader result all find the same jobs."""
+    db_filename, cursor, jobs = db_jobs
+    corpus = jobs_filtering.build_search_corpus(jobs)
+    filters = (False, 100_000, "python", "")
+
+    expected = filterworker.filter_indexes(jobs, corpus, filters)
+    assert expected and expected == filterworker.filter_indexes(jobs, corpus, filters, cursor=cursor)
+    broader = filterworker.filter_indexes(jobs, corpus, (False, 0, "pyth", ""))
+    assert filterworker.filter_indexes(jobs, corpus, filters, broader, cursor) == expected
+
+    with pytest.raises(filterworker.FilterCancelled):
+        filterworker.filter_indexes(jobs, corpus, filters, is_cancelled=lambda: True)
+
+
+def test_filter_indexes_broader_database(tmp_path):
+    """Tests a result is the same with and without a cached broader result when filtering with a database."""
+    connection, cursor = jobs_db.open_db(tmp_path / "jobs.sqlite")
+    jobs_db.setup_db(cursor)
+    jobs = [(str(i), "Engineer", "Company", "Boston, MA", "", "3 days ago", "", i != 1, [], ["ÉCOLE"])
+            for i in range(4)]
+    jobs_db.ingest_jobs(cursor, jobs)
+    corpus = jobs_filtering.build_search_corpus(jobs)
+
+    for keyword in ["days ago", "é"]:
+        filters = (True, 0, keyword, "")
+        broader = filterworker.filter_indexes(jobs, corpus, (True, 0, "", ""), None, cursor)
+        expected = filterworker.filter_indexes(jobs, corpus, filters, None, cursor)
+        assert filterworker.filter_indexes(jobs, corpus, filters, broader, cursor) == expected, keyword
+    assert filterworker.filter_indexes(jobs, corpus, (True, 0, "days ago", ""), None, cursor) == [0, 2, 3]
+    jobs_db.close_db(connection)
+
+
+def test_filter_worker(db_jobs):
+    """Tests a worker sends its result with its own database connection, and a cancelled worker sends nothing."""
+    db_filename, cursor, jobs = db_jobs
+    corpus = jobs_filtering.build_search_corpus(jobs)
+    filters = (False, 0, "python", "")
+    results = []
+
+    worker = filterworker.FilterWorker(3, jobs, corpus, filters, db_filename=jobs_db.get_db_filename(cursor))
+    worker.signals.finished.connect(lambda *result: results.append(result))
+    worker.run()
+    assert results == [(3, filters, filterworker.filter_indexes(jobs, corpus, filters))]
+    assert worker.connection is None
+
+    worker = filterworker.FilterWorker(4, jobs, corpus, filters)
+    worker.signals.finished.connect(lambda *result: results.append(result))
+    worker.cancel()
+    worker.run()
+    assert len(results) == 1
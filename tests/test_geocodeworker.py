@@ -0,0 +1,73 @@
+"""Testing GeocodeWorker in geocodeworker.py."""
+
+import threading
+import time
+import jobs_geocoding
+from geocodeworker import GeocodeWorker
+
+
+def test_geocode_worker(tmp_path, stand_in_geocoder):
+    """Tests each location's result and the progress are sent as they're known, and results are cached."""
+    geocoder = stand_in_geocoder({"Boston, MA": (42.36, -71.06), "Austin, TX": (30.27, -97.74)})
+    locations = ["Boston, MA", "Nowhere", "Austin, TX"]
+    signals = []
+
+    worker = GeocodeWorker(2, locations, geocoder, tmp_path / "geocode.sqlite",
+                           jobs_geocoding.RateLimiter(1000))
+    worker.signals.located.connect(lambda *args: signals.append(("located",) + args))
+    worker.signals.progress.connect(lambda *args: signals.append(("progress",) + args))
+    worker.signals.finished.connect(lambda *args: signals.append(("finished",) + args))
+    worker.run()
+
+    assert signals == [("located", 2, "Boston, MA", (42.36, -71.06)), ("progress", 2, 1, 3),
+                       ("located", 2, "Nowhere", None), ("progress", 2, 2, 3),
+                       ("located", 2, "Austin, TX", (30.27, -97.74)), ("progress", 2, 3, 3),
+                       ("finished", 2)]
+    cache = jobs_geocoding.GeocodeCache(tmp_path / "geocode.sqlite")
+    assert cache.get("Austin, TX") == (30.27, -97.74)
+    cache.close()
+
+
+def test_geocode_worker_cancel(stand_in_geocoder):
+    """Tests a cancelled worker stops without waiting out the rate limit, asking the geocoder or sending anything."""
+    geocoder = stand_in_geocoder({})
+    signals = []
+
+    worker = GeocodeWorker(1, ["Boston, MA", "Austin, TX"], geocoder,
+                           rate_limiter=jobs_geocoding.RateLimiter(0.001))
+    worker.signals.located.connect(lambda *args: signals.append(args))
+    worker.signals.finished.connect(lambda *args: signals.append(args))
+    worker.cancel()
+    worker.run()
+
+    assert signals == [] and geocoder.calls == 0
+
+    # Cancelled while waiting out the rate limit before its second request
+    worker = GeocodeWorker(1, ["Boston, MA", "Austin, TX"], geocoder,
+                           rate_limiter=jobs_geocoding.RateLimiter(0.001))
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    thread.join(0.5)
+    worker.cancel()
+    thread.join(5)
+    assert not thread.is_alive() and geocoder.calls == 1
+
+
+def test_geocode_workers_share_rate_limit(stand_in_geocoder):
+    """Tests a worker replacing a cancelled one still waits out the rate limit after the cancelled one's request."""
+    geocoder = stand_in_geocoder({})
+    request_times = []
+    geocode = geocoder.geocode
+    geocoder.geocode = lambda location: (request_times.append(time.monotonic()), geocode(location))[1]
+    rate_limiter = jobs_geocoding.RateLimiter(2)
+
+    first = GeocodeWorker(1, ["Boston, MA", "Austin, TX"], geocoder, rate_limiter=rate_limiter)
+    thread = threading.Thread(target=first.run)
+    thread.start()
+    thread.join(0.1)
+    first.cancel()
+    thread.join(5)
+    GeocodeWorker(2, ["Denver, CO"], geocoder, rate_limiter=rate_limiter).run()
+
+    assert geocoder.calls == 2
+    assert request_times[1] - request_times[0] >= 0.5
@@ -0,0 +1,25 @@
+"""Testing JobListModel in joblistmodel.py."""
+
+from PySide6.QtCore import Qt
+from joblistmodel import JobListModel
+
+
+JOBS = [("1", "Developer", "Company A"), ("2", "Tester", "Company B"), ("3", "Analyst", "Company C")]
+
+
+def test_job_list_model():
+    """Tests rows are the jobs at the model's positions, and swapping positions is a single reset."""
+    model = JobListModel(JOBS)
+    assert model.rowCount() == 3
+    assert model.index(1).data() == "Tester\nCompany B"
+    assert model.index(1).data(Qt.ItemDataRole.ToolTipRole) is None
+
+    resets = []
+    model.modelReset.connect(lambda: resets.append(True))
+    model.set_indexes([2, 0])
+
+    assert len(resets) == 1
+    assert model.rowCount() == 2
+    assert model.index(0).data() == "Analyst\nCompany C"
+    assert model.get_job(1) == JOBS[0]
+    assert model.get_jobs() == [JOBS[2], JOBS[0]]
@@ -0,0 +1,41 @@
+"""Testing functions in jobs_cache.py."""
+
+import pytest
+import time
+import jobs_cache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = jobs_cache.ResponseCache(tmp_path / "cache.sqlite")
+    yield cache
+    cache.close()
+
+
+def test_cache_key_ignores_api_key(cache):
+    """Tests responses are stored by request parameters, not by which api key made the request."""
+    cache.put({"q": "developer", "start": 0, "api_key": "first"}, [{"job_id": "1"}])
+    assert cache.get({"q": "developer", "start": 0, "api_key": "second"}) == [{"job_id": "1"}]
+    assert cache.get({"q": "developer", "start": 10, "api_key": "first"}) is None
+
+
+def test_cache_ttl(cache):
+    """Tests expired responses aren't served."""
+    cache.ttl = 0.05
+    cache.put({"start": 0}, [])
+    assert cache.get({"start": 0}) == []
+    time.sleep(0.1)
+    assert cache.get({"start": 0}) is None
+
+
+def test_cache_eviction(cache):
+    """Tests the least recently used responses are removed when the cache is over its size limit."""
+    cache.max_bytes = 100
+    cache.put({"start": 0}, "a" * 40)
+    cache.put({"start": 10}, "b" * 40)
+    cache.get({"start": 0})
+    cache.put({"start": 20}, "c" * 40)
+
+    assert cache.get({"start": 0}) == "a" * 40
+    assert cache.get({"start": 10}) is None
+    assert cache.get({"start": 20}) == "c" * 40
@@ -2,6 +2,7 @@
 
 import pytest
 import jobs_db
+import jobs_filtering
 import sqlite3
 
 
@@ -51,3 +52,288 @@ def test_jobs_db():
     assert fetch[1][2] == "Python"
 
     jobs_db.close_db(db_connection)
+
+
+@pytest.fixture
+def cursor():
+    """Empty database in memory with tables set up."""
+    db_connection, cursor = jobs_db.open_db(":memory:")
+    jobs_db.setup_db(cursor)
+    yield cursor
+    jobs_db.close_db(db_connection)
+
+
+def make_job(job_id, links=("google.com", "something.com"), qualifications=("React", "Python")):
+    return (job_id, "Software Engineer Intern", "Studious Studios", "Austin, Indiana", "Developing Applications",
+            "3 days ago", "10K-12K a year", True, list(links), list(qualifications))
+
+
+def test_insert_jobs_bulk(cursor):
+    """Tests jobs are inserted in batches and inserted/skipped rows are counted."""
+    jobs = [make_job(str(i)) for i in range(25)]
+
+    inserted, skipped = jobs_db.insert_jobs_bulk(cursor, (j for j in jobs), batch_size=10)
+    assert (inserted, skipped) == (25 * 5, 0)
+    assert not cursor.connection.in_transaction
+
+    cursor.execute("SELECT COUNT(*) FROM jobs")
+    assert cursor.fetchone()[0] == 25
+    cursor.execute("SELECT url FROM related_links WHERE job_id = '3' ORDER BY link_id")
+    assert [r[0] for r in cursor.fetchall()] == ["google.com", "something.com"]
+
+    # Jobs already stored and jobs missing a title are skipped
+    inserted, skipped = jobs_db.insert_jobs_bulk(cursor, [make_job("0", links=[], qualifications=[]),
+                                                          ("new",) + (None,) * 7 + ([], [])])
+    assert (inserted, skipped) == (0, 2)
+
+
+def test_insert_jobs_bulk_rollback(cursor):
+    """Tests nothing is inserted when a batch fails."""
+    with pytest.raises(sqlite3.Error):
+        jobs_db.insert_jobs_bulk(cursor, [make_job("1"), make_job("2", links=[object()])])
+
+    cursor.execute("SELECT COUNT(*) FROM jobs")
+    assert cursor.fetchone()[0] == 0
+
+
+def test_insert_jobs_bulk_caller_transaction(cursor):
+    """Tests a transaction the caller has open is neither committed nor rolled back by inserting."""
+    cursor.execute("INSERT INTO jobs (job_id, title, company_name) VALUES ('caller', 'Title', 'Company')")
+    jobs_db.insert_jobs_bulk(cursor, [make_job("1")])
+    assert cursor.connection.in_transaction
+
+    with pytest.raises(sqlite3.Error):
+        jobs_db.insert_jobs_bulk(cursor, [make_job("2"), make_job("3", links=[object()])])
+    assert cursor.connection.in_transaction
+    cursor.execute("SELECT job_id FROM jobs ORDER BY job_id")
+    assert [r[0] for r in cursor.fetchall()] == ["1", "caller"]
+
+    cursor.connection.rollback()
+    cursor.execute("SELECT COUNT(*) FROM jobs")
+    assert cursor.fetchone()[0] == 0
+
+
+def test_migrate_db():
+    """Tests tables made before migrations are upgraded in place and their repeated rows are removed."""
+    db_connection, cursor = jobs_db.open_db(":memory:")
+    cursor.execute('''CREATE TABLE jobs (job_id TEXT PRIMARY KEY, title TEXT NOT NULL, company_name TEXT NOT NULL,
+                      location TEXT DEFAULT "", description TEXT DEFAULT "", posted_at TEXT DEFAULT "",
+                      salary TEXT DEFAULT "", remote BOOLEAN DEFAULT FALSE);''')
+    cursor.execute("CREATE TABLE related_links (link_id INTEGER PRIMARY KEY, job_id INTEGER NOT NULL, url TEXT NOT NULL);")
+    cursor.execute('''CREATE TABLE qualifications (qualification_id INTEGER PRIMARY KEY, job_id INTEGER NOT NULL,
+                      qualification TEXT NOT NULL);''')
+    cursor.execute("INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)", make_job("1")[:8])
+    for _ in range(2):  # Old inserts added every link and qualification again
+        cursor.executemany("INSERT INTO related_links (job_id, url) VALUES ('1', ?)", [("google.com",), ("something.com",)])
+        cursor.executemany("INSERT INTO qualifications (job_id, qualification) VALUES ('1', ?)", [("React",), ("Python",)])
+
+    jobs_db.setup_db(cursor)
+
+    cursor.execute("PRAGMA user_version")
+    assert cursor.fetchone()[0] == len(jobs_db.MIGRATIONS)
+    cursor.execute("SELECT url FROM related_links ORDER BY link_id")
+    assert [r[0] for r in cursor.fetchall()] == ["google.com", "something.com"]
+    cursor.execute("SELECT qualification FROM qualifications ORDER BY qualification_id")
+    assert [r[0] for r in cursor.fetchall()] == ["React", "Python"]
+
+    cursor.execute("SELECT salary_min_yearly, salary_max_yearly FROM jobs")
+    assert cursor.fetchone() == (10_000, 12_000)
+
+    assert jobs_db.insert_jobs_bulk(cursor, [make_job("1")]) == (0, 5)
+    jobs_db.close_db(db_connection)
+
+
+def test_get_jobs(cursor):
+    """Tests jobs come back with their own links and qualifications, each only once and in order."""
+    jobs_db.insert_jobs(cursor, [make_job("1", links=["a.com", "b.com", "a.com"], qualifications=["C", "B", "A"]),
+                                 make_job("2", links=[], qualifications=[])])
+
+    jobs = jobs_db.get_jobs(cursor)
+
+    assert [j[0] for j in jobs] == ["1", "2"]
+    assert jobs[0][:8] == list(make_job("1")[:8])
+    assert jobs[0][8] == ["a.com", "b.com"]
+    assert jobs[0][9] == ["C", "B", "A"]
+    assert jobs[1][8] == [] and jobs[1][9] == []
+
+
+def test_iter_jobs(cursor):
+    """Tests jobs are read in batches, in order, and only with the requested columns."""
+    jobs_db.insert_jobs(cursor, [make_job(str(i)) for i in range(7)])
+
+    assert [j[0] for j in jobs_db.iter_jobs(cursor, batch_size=3)] == [str(i) for i in range(7)]
+    assert list(jobs_db.iter_jobs(cursor, batch_size=3, columns=["title", "related_links"], after_job_id="4")) == [
+        ["Software Engineer Intern", ["google.com", "something.com"]],
+        ["Software Engineer Intern", ["google.com", "something.com"]]
+    ]
+    with pytest.raises(ValueError):
+        next(jobs_db.iter_jobs(cursor, columns=["job_id; DROP TABLE jobs"]))
+
+
+def test_ingest_jobs(cursor):
+    """Tests ingesting only writes new and changed jobs, and replaces the links and qualifications of changed jobs."""
+    jobs = [make_job(str(i)) for i in range(5)]
+    assert jobs_db.ingest_jobs(cursor, jobs) == {"new": 5, "changed": 0, "unchanged": 0, "repeated": 0}
+
+    changes_before = cursor.connection.total_changes
+    assert jobs_db.ingest_jobs(cursor, jobs) == {"new": 0, "changed": 0, "unchanged": 5, "repeated": 0}
+    assert cursor.connection.total_changes == changes_before
+
+    jobs[2] = make_job("2", links=["new.com"], qualifications=["Rust"])
+    summary = jobs_db.ingest_jobs(cursor, jobs + [make_job("5"), make_job("5", links=[])], batch_size=2)
+    assert summary == {"new": 1, "changed": 1, "unchanged": 4, "repeated": 1}
+
+    job = next(jobs_db.iter_jobs(cursor, after_job_id="1"))
+    assert job[8] == ["new.com"] and job[9] == ["Rust"]
+    assert len(jobs_db.get_jobs(cursor)[5][8]) == 2
+
+
+def search(cursor, keyword):
+    return set(jobs_db.get_filtered_job_ids(cursor, False, 0, keyword, ""))
+
+
+def test_search_keyword(cursor):
+    """Tests the full-text index finds keywords in any part of job data, and stays in sync with changed jobs."""
+    jobs_db.insert_jobs(cursor, [make_job("1"), make_job("2", links=["jobs.example.com"], qualifications=["C++ 100%"])])
+
+    assert search(cursor, "python") == {"1"}
+    assert search(cursor, "STUDIOUS") == {"1", "2"}
+    assert search(cursor, "example.com") == {"2"}
+    assert search(cursor, 'C++ "') == set()
+    assert search(cursor, "0%") == {"2"}
+    assert search(cursor, "_") == set()
+    assert search(cursor, "days ago") == {"1", "2"}
+    assert search(cursor, "12K a year") == {"1", "2"}
+
+    jobs_db.ingest_jobs(cursor, [make_job("1", qualifications=["Rust"])])
+    assert search(cursor, "python") == set()
+    assert search(cursor, "Ru") == {"1"}
+
+
+def test_search_keyword_like_memory(cursor):
+    """Tests the full-text index finds the same jobs as the in-memory keyword filter."""
+    jobs = [make_job("1"), make_job("2", links=["jobs.example.com"], qualifications=["Straße", "ÉCOLE"]),
+            make_job("3")[:5] + ("1 day ago", "60 hourly") + make_job("3")[7:]]
+    jobs_db.insert_jobs(cursor, jobs)
+    corpus = jobs_filtering.build_search_corpus(jobs)
+
+    for keyword in ["python", "STUDIOUS", "days ago", "day ago", "hourly", "3", "asdf", "STRAßE", "strasse", "école",
+                    "example", "12k"]:
+        in_memory = {jobs[i][0] for i in jobs_filtering.filter_job_indexes(jobs, False, 0, keyword, "", corpus)}
+        assert search(cursor, keyword) == in_memory, keyword
+
+
+def test_get_filtered_job_ids(cursor):
+    """Tests all filters are applied by one query, giving job ids in order."""
+    jobs = [make_job(str(i)) for i in range(4)]
+    jobs[0] = jobs[0][:3] + ("Boston, MA 02115 (+2 others)",) + jobs[0][4:]
+    jobs[1] = jobs[1][:7] + ("",) + jobs[1][8:]
+    jobs[3] = jobs[3][:3] + ("Boston, MA",) + jobs[3][4:6] + ("100K - 120K",) + jobs[3][7:]
+    jobs_db.insert_jobs(cursor, jobs)
+
+    assert jobs_db.get_filtered_job_ids(cursor, False, 0, "", "") == ["0", "1", "2", "3"]
+    assert jobs_db.get_filtered_job_ids(cursor, True, 0, "", "") == ["0", "2", "3"]
+    assert jobs_db.get_filtered_job_ids(cursor, False, 0, "", "Boston, MA") == ["0", "3"]
+    assert jobs_db.get_filtered_job_ids(cursor, True, 50_000, "python", "Boston, MA") == ["3"]
+    assert jobs_db.get_filtered_job_ids(cursor, False, 0, "Ru", "") == []
+    assert jobs_db.get_filtered_job_ids(cursor, True, 0, "", "", ["3", "1", "0"]) == ["0", "3"]
+    assert jobs_db.get_filtered_job_ids(cursor, False, 0, "python", "", ["1", "2"]) == ["1", "2"]
+    assert jobs_db.get_filtered_job_ids(cursor, False, 0, "", "", []) == []
+
+    # Yearly salaries are worked out when jobs are inserted
+    jobs[2] = jobs[2][:6] + ("60 hourly",) + jobs[2][7:]
+    jobs_db.ingest_jobs(cursor, jobs)
+    assert jobs_db.get_filtered_job_ids(cursor, False, 100_000, "", "") == ["2", "3"]
+    assert jobs_db.get_filtered_job_ids(cursor, False, 12_000, "", "") == ["2", "3"]
+    assert jobs_db.get_filtered_job_ids(cursor, False, 10_000, "", "") == ["0", "1", "2", "3"]
+
+
+def test_renormalize_salaries(cursor):
+    """Tests yearly salaries of every stored job are worked out again."""
+    jobs_db.insert_jobs(cursor, [make_job("1"), make_job("2")[:6] + ("25 an hour",) + make_job("2")[7:]])
+    cursor.execute("UPDATE jobs SET salary_min_yearly = NULL, salary_max_yearly = NULL")
+
+    assert jobs_db.renormalize_salaries(cursor) == 2
+    cursor.execute("SELECT salary_min_yearly, salary_max_yearly FROM jobs ORDER BY job_id")
+    assert cursor.fetchall() == [(10_000, 12_000), (52_000, 52_000)]
+
+
+def test_open_db_read_only(tmp_path):
+    """Tests a second, read only connection can be opened to the file of a database."""
+    connection, cursor = jobs_db.open_db(tmp_path / "jobs.sqlite")
+    jobs_db.setup_db(cursor)
+    jobs_db.insert_jobs(cursor, [make_job("1")])
+    assert jobs_db.get_db_filename(cursor) == str(tmp_path / "jobs.sqlite")
+
+    read_connection, read_cursor = jobs_db.open_db(jobs_db.get_db_filename(cursor), read_only=True)
+    assert [j[0] for j in jobs_db.get_jobs(read_cursor)] == ["1"]
+    with pytest.raises(sqlite3.OperationalError):
+        read_cursor.execute("DELETE FROM jobs;")
+    read_connection.close()
+    jobs_db.close_db(connection)
+
+    assert jobs_db.get_db_filename(jobs_db.open_db(":memory:")[1]) is None
+
+
+def test_geocode_jobs(cursor, stand_in_geocoder):
+    """Tests each distinct location is geocoded once, and coordinates are stored until the job's location changes."""
+    jobs = [make_job(str(i)) for i in range(4)]
+    jobs[1] = jobs[1][:3] + ("Austin, Indiana (+2 others)",) + jobs[1][4:]
+    jobs[2] = jobs[2][:3] + ("Nowhere",) + jobs[2][4:]
+    jobs[3] = jobs[3][:3] + ("",) + jobs[3][4:]
+    jobs_db.ingest_jobs(cursor, jobs)
+    geocoder = stand_in_geocoder({"Austin, Indiana": (38.74, -85.81)})
+
+    assert jobs_db.geocode_jobs(cursor, geocoder) == {"located": 2, "not found": 1}
+    assert geocoder.calls == 2
+    assert not cursor.connection.in_transaction
+    assert jobs_db.get_job_coordinates(cursor, ["0", "1", "2", "3"], batch_size=2) == {"0": (38.74, -85.81),
+                                                                                        "1": (38.74, -85.81)}
+
+    # Only jobs without coordinates are geocoded again
+    assert jobs_db.geocode_jobs(cursor, geocoder) == {"located": 0, "not found": 1}
+    assert geocoder.calls == 3
+
+    # Changing a job's location drops its coordinates, but other changes keep them
+    jobs[0] = jobs[0][:3] + ("Boston, MA",) + jobs[0][4:]
+    jobs[1] = jobs[1][:4] + ("New description",) + jobs[1][5:]
+    jobs_db.ingest_jobs(cursor, jobs)
+    assert jobs_db.get_job_coordinates(cursor, ["0", "1"]) == {"1": (38.74, -85.81)}
+    geocoder.locations["Boston, MA"] = (42.36, -71.06)
+    assert jobs_db.geocode_jobs(cursor, geocoder) == {"located": 1, "not found": 1}
+    assert jobs_db.get_job_coordinates(cursor, ["0"]) == {"0": (42.36, -71.06)}
+
+
+def test_geocode_jobs_offline_misses(cursor, tmp_path, stand_in_geocoder):
+    """Tests the offline geocoder is only asked again about a location it didn't find once its version or the job's
+    location changes, while the cache is still checked every time."""
+    import jobs_geocoding
+    jobs = [make_job(str(i)) for i in range(2)]
+    jobs[0] = jobs[0][:3] + ("Boston, MA",) + jobs[0][4:]
+    jobs[1] = jobs[1][:3] + ("Nowhere",) + jobs[1][4:]
+    jobs_db.ingest_jobs(cursor, jobs)
+    offline_geocoder = stand_in_geocoder({"Boston, MA": (42.36, -71.06)})
+    versions = ["1"]
+    offline_geocoder.get_version = lambda: versions[-1]
+    cache = jobs_geocoding.GeocodeCache(tmp_path / "geocode.sqlite")
+
+    assert jobs_db.geocode_jobs(cursor, None, cache, offline_geocoder) == {"located": 1, "not found": 1}
+    assert offline_geocoder.calls == 2
+    assert jobs_db.geocode_jobs(cursor, None, cache, offline_geocoder) == {"located": 0, "not found": 1}
+    assert offline_geocoder.calls == 2
+
+    versions.append("2")
+    assert jobs_db.geocode_jobs(cursor, None, cache, offline_geocoder) == {"located": 0, "not found": 1}
+    assert offline_geocoder.calls == 3
+
+    jobs[1] = jobs[1][:3] + ("Elsewhere",) + jobs[1][4:]
+    jobs_db.ingest_jobs(cursor, jobs)
+    assert jobs_db.geocode_jobs(cursor, None, cache, offline_geocoder) == {"located": 0, "not found": 1}
+    assert offline_geocoder.calls == 4
+
+    # Found by the map since
+    cache.put("Elsewhere", (1.0, 2.0))
+    assert jobs_db.geocode_jobs(cursor, None, cache, offline_geocoder) == {"located": 1, "not found": 0}
+    assert offline_geocoder.calls == 4
+    assert jobs_db.get_job_coordinates(cursor, ["1"]) == {"1": (1.0, 2.0)}
+    cache.close()
@@ -1,6 +1,9 @@
 """Testing functions in test_jobs_results.py."""
 
 import pytest
+import os
+import shutil
+import openpyxl
 import jobs_excel
 import jobs_db
 import sqlite3
@@ -45,4 +48,71 @@ def test_get_jobs(excel_file_path):
     assert fetch[6] == jobs[0][6]
     assert fetch[7] == ""
 
-    jobs_db.close_db(db_connection)
\ No newline at end of file
+    jobs_db.close_db(db_connection)
+
+
+def test_iter_jobs(excel_file_path):
+    """Tests rows are read one at a time in the same shape as get_jobs() and can go straight into the database."""
+    jobs = jobs_excel.iter_jobs(excel_file_path)
+    first = next(jobs)
+    assert first == jobs_excel.get_jobs(excel_file_path)[0]
+
+    db_connection, cursor = jobs_db.open_db(":memory:")
+    jobs_db.setup_db(cursor)
+    jobs_db.insert_jobs_bulk(cursor, jobs)
+    cursor.execute("SELECT COUNT(*) FROM jobs")
+    assert cursor.fetchone()[0] == 677  # Rest of the 678 unique job ids
+    jobs_db.close_db(db_connection)
+
+
+def test_get_jobs_snapshot(excel_file_path, tmp_path):
+    """Tests jobs are loaded from the snapshot while the Excel file is unchanged, and re-read once it changes."""
+    excel_copy = tmp_path / "jobs.xlsx"
+    snapshot = tmp_path / "jobs.snapshot"
+    shutil.copyfile(excel_file_path, excel_copy)
+
+    jobs = jobs_excel.get_jobs(excel_copy, snapshot)
+    assert snapshot.exists()
+    assert list(jobs_excel.load_snapshot(excel_copy, snapshot)) == jobs
+    assert jobs_excel.get_jobs(excel_copy, snapshot) == jobs
+
+    # Same contents with a new modification time keeps the snapshot
+    os.utime(excel_copy, ns=(0, 0))
+    assert list(jobs_excel.load_snapshot(excel_copy, snapshot)) == jobs
+
+    # Changed contents don't use the snapshot
+    workbook = openpyxl.load_workbook(excel_copy)
+    workbook.active["J2"] = "Changed Title"
+    workbook.save(excel_copy)
+    assert jobs_excel.load_snapshot(excel_copy, snapshot) is None
+    assert jobs_excel.get_jobs(excel_copy, snapshot)[0][1] == "Changed Title"
+
+
+def test_iter_cached_jobs(excel_file_path, tmp_path, monkeypatch):
+    """Tests jobs stream from the snapshot in chunks, and a snapshot that wasn't read to the end isn't kept."""
+    monkeypatch.setattr(jobs_excel, "SNAPSHOT_CHUNK_SIZE", 100)
+    snapshot = tmp_path / "jobs.snapshot"
+
+    jobs = jobs_excel.iter_cached_jobs(excel_file_path, snapshot)
+    next(jobs)
+    jobs.close()
+    assert not snapshot.exists()
+    assert not os.path.exists(f"{snapshot}.tmp")
+
+    expected = jobs_excel.get_jobs(excel_file_path)
+    assert list(jobs_excel.iter_cached_jobs(excel_file_path, snapshot)) == expected
+    assert list(jobs_excel.iter_cached_jobs(excel_file_path, snapshot)) == expected
+
+
+def test_iter_cached_jobs_damaged_snapshot(excel_file_path, tmp_path, monkeypatch):
+    """Tests a truncated snapshot falls back to the Excel file partway through, without repeating or losing jobs."""
+    monkeypatch.setattr(jobs_excel, "SNAPSHOT_CHUNK_SIZE", 100)
+    snapshot = tmp_path / "jobs.snapshot"
+    expected = jobs_excel.get_jobs(excel_file_path, snapshot)
+
+    with open(snapshot, "r+b") as file:
+        file.truncate(os.path.getsize(snapshot) // 2)
+    assert jobs_excel.get_jobs(excel_file_path, snapshot) == expected
+
+    # Snapshot is written again from the Excel file
+    assert list(jobs_excel.load_snapshot(excel_file_path, snapshot)) == expected
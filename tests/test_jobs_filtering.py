@@ -3,6 +3,7 @@
 import pytest
 
 import jobs_filtering
+import jobs_records
 
 
 @pytest.fixture
@@ -52,3 +53,78 @@ def test_remove_parenthesis_in_location():
     """Test extra information in city string being removed correctly."""
     city = "Boston, MA (+2 others)"
     assert jobs_filtering.remove_parenthesis_in_location(city) == "Boston, MA"
+
+
+def test_filter_job_ids(jobs):
+    """Test jobs being filtered by a set of job ids (like database search results) correctly."""
+    jobs = jobs_filtering.filter_job_ids(jobs, {"1", "3", "4"})
+    assert [j[0] for j in jobs] == ["1", "3"]
+
+
+def test_filter_keyword_corpus(jobs):
+    """Test keyword filter using search text built ahead of time, including matching without regard to case."""
+    corpus = jobs_filtering.build_search_corpus(jobs)
+    assert [j[0] for j in jobs_filtering.filter_keyword(jobs, "NEW YORK", corpus)] == ["1", "3"]
+    assert jobs_filtering.filter_keyword(jobs, "york job", corpus) == []
+    assert jobs_filtering.filter_keyword(jobs, "", corpus) == jobs
+
+
+def test_get_yearly_salary_range():
+    """Test salary strings from both data sources being read as yearly ranges, including ones that aren't salaries."""
+    assert jobs_filtering.get_yearly_salary_range("100K - 120K") == (100_000, 120_000)
+    assert jobs_filtering.get_yearly_salary_range("10K-12K a year") == (10_000, 12_000)
+    assert jobs_filtering.get_yearly_salary_range("25–30 an hour") == (52_000, 62_400)
+    assert jobs_filtering.get_yearly_salary_range("35 - -1 hourly") == (72_800, 72_800)
+    assert jobs_filtering.get_yearly_salary_range("3000 - 4000 monthly") == (36_000, 48_000)
+    assert jobs_filtering.get_yearly_salary_range("0") == (None, None)
+    assert jobs_filtering.get_yearly_salary_range("Competitive") == (None, None)
+    assert jobs_filtering.get_yearly_salary("$60,000 a year") == 60_000
+
+
+@pytest.mark.parametrize("remote_checked, user_min_salary, keyword, user_city", [
+    (False, 0, "", ""), (True, 0, "", ""), (False, 110_000, "", ""), (False, 0, "python", ""),
+    (False, 0, "", "New York"), (True, 100_000, "job", "New York")
+])
+def test_filter_jobs(jobs, remote_checked, user_min_salary, keyword, user_city):
+    """Test all filters in a single pass giving the same jobs as each filter one after another."""
+    expected = jobs_filtering.filter_remote(jobs, remote_checked)
+    expected = jobs_filtering.filter_min_salary(expected, user_min_salary)
+    expected = jobs_filtering.filter_keyword(expected, keyword)
+    expected = jobs_filtering.filter_city_location(expected, user_city)
+
+    assert jobs_filtering.filter_jobs(jobs, remote_checked, user_min_salary, keyword, user_city) == expected
+
+    records = list(jobs_records.from_jobs(jobs))
+    indexes = jobs_filtering.filter_job_indexes(records, remote_checked, user_min_salary, keyword, user_city,
+                                                jobs_filtering.build_search_corpus(records))
+    assert [jobs[i] for i in indexes] == expected
+
+
+def test_is_narrower():
+    """Test telling when every job matching some filters also matches other filters."""
+    assert jobs_filtering.is_narrower((True, 100, "Python", "Boston"), (False, 0, "pyth", ""))
+    assert jobs_filtering.is_narrower((False, 0, "", ""), (False, 0, "", ""))
+    assert not jobs_filtering.is_narrower((False, 0, "python", ""), (True, 0, "", ""))
+    assert not jobs_filtering.is_narrower((False, 0, "pyth", ""), (False, 0, "python", ""))
+    assert not jobs_filtering.is_narrower((False, 100, "", "Boston"), (False, 200, "", ""))
+    assert not jobs_filtering.is_narrower((False, 0, "", "Austin"), (False, 0, "", "Boston"))
+
+
+def test_filter_cache(jobs):
+    """Test cached filter results being reused, narrowed and evicted."""
+    corpus = jobs_filtering.build_search_corpus(jobs)
+    cache = jobs_filtering.FilterCache(max_size=2)
+
+    cache.put((False, 0, "", ""), [0, 1, 2])
+    cache.put((True, 0, "", ""), [0, 2])
+    assert cache.get((True, 0, "", "")) == [0, 2]
+    assert cache.get((True, 0, "py", "")) is None
+
+    broader = cache.get_broader((True, 0, "py", ""))
+    assert broader == [0, 2]
+    assert jobs_filtering.filter_job_indexes(jobs, True, 0, "py", "", corpus, broader) == [2]
+
+    cache.put((True, 0, "py", ""), [2])
+    assert cache.get((False, 0, "", "")) is None  # Least recently used
+    cache.clear()
+    assert cache.get_broader((True, 0, "python", "")) is None
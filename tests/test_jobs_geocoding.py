@@ -0,0 +1,158 @@
+"""Testing functions in jobs_geocoding.py."""
+
+import pytest
+import threading
+import time
+import jobs_geocoding
+
+
+def test_geocode_location_cache(tmp_path, stand_in_geocoder):
+    """Tests found and not found locations are cached across runs, and failed requests aren't."""
+    geocoder = stand_in_geocoder({"Boston, MA": (42.36, -71.06)}, failing={"Austin, TX"})
+    cache = jobs_geocoding.GeocodeCache(tmp_path / "geocode.sqlite")
+    assert jobs_geocoding.geocode_location("Boston, MA", geocoder, cache) == (42.36, -71.06)
+    assert jobs_geocoding.geocode_location("Nowhere", geocoder, cache) is None
+    assert jobs_geocoding.geocode_location("Austin, TX", geocoder, cache) is None
+    cache.close()
+
+    # Next run
+    cache = jobs_geocoding.GeocodeCache(tmp_path / "geocode.sqlite")
+    geocoder.calls = 0
+    assert jobs_geocoding.geocode_location("Boston, MA", geocoder, cache) == (42.36, -71.06)
+    assert jobs_geocoding.geocode_location("Nowhere", geocoder, cache) is None
+    assert geocoder.calls == 0
+    assert cache.get("Austin, TX") is None
+    cache.close()
+
+
+def test_geocode_cache_expiry(tmp_path):
+    """Tests locations that weren't found expire sooner than found coordinates."""
+    cache = jobs_geocoding.GeocodeCache(tmp_path / "geocode.sqlite", ttl=100, negative_ttl=10)
+    cache.put("Boston, MA", (42.36, -71.06))
+    cache.put("Nowhere", None)
+    assert cache.get("Nowhere") == (None, None)
+
+    cache.connection.execute("UPDATE geocodes SET created_at = ?;", (time.time() - 50,))
+    assert cache.get("Boston, MA") == (42.36, -71.06)
+    assert cache.get("Nowhere") is None
+
+    cache.evict()
+    assert cache.connection.execute("SELECT location FROM geocodes;").fetchall() == [("Boston, MA",)]
+    cache.close()
+
+
+def test_rate_limiter():
+    """Tests calls are spaced out to the rate limit."""
+    now = [100.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    rate_limiter = jobs_geocoding.RateLimiter(2, clock=lambda: now[0], sleep=sleep)
+    rate_limiter.wait()
+    rate_limiter.wait()
+    now[0] += 0.2
+    rate_limiter.wait()
+    now[0] += 5
+    rate_limiter.wait()
+    assert sleeps == [pytest.approx(0.5), pytest.approx(0.3)]
+
+    # A cancelled wait doesn't count as a request
+    cancel_event = threading.Event()
+    cancel_event.set()
+    assert rate_limiter.wait(cancel_event) is False
+    assert rate_limiter.wait() is True and sleeps[2:] == [pytest.approx(0.5)]
+
+
+def test_geocode_locations(tmp_path, stand_in_geocoder):
+    """Tests locations are geocoded in order, and only requests to the geocoder wait on the rate limit."""
+    locations = ["Boston, MA", "Austin, TX"]
+
+    geocoder = stand_in_geocoder({"Boston, MA": (42.36, -71.06)})
+    cache = jobs_geocoding.GeocodeCache(tmp_path / "geocode.sqlite")
+    cache.put("Boston, MA", (42.36, -71.06))
+    sleeps = []
+    rate_limiter = jobs_geocoding.RateLimiter(1, clock=lambda: 0.0, sleep=sleeps.append)
+    rate_limiter.wait()
+
+    results = list(jobs_geocoding.geocode_locations(locations, geocoder, cache, rate_limiter))
+    assert results == [("Boston, MA", (42.36, -71.06)), ("Austin, TX", None)]
+    assert geocoder.calls == 1 and sleeps == [1.0]
+
+    cancel_event = threading.Event()
+    cancel_event.set()
+    assert list(jobs_geocoding.geocode_locations(locations, geocoder, cache, cancel_event=cancel_event)) == []
+    cache.close()
+
+
+@pytest.mark.parametrize("location, expected", [
+    ("Boston, MA", (42.355, -71.064)),
+    ("Cambridge, MA 02139", (42.364, -71.101)),
+    ("Austin, Texas", (30.289, -97.758)),
+    ("Saint Louis, Missouri, USA", (38.634, -90.272)),
+    ("St. Louis, MO", (38.634, -90.272)),
+    ("Anywhere", None),
+    ("Springfield, XY", None),
+])
+def test_gazetteer_geocoder(gazetteer, location, expected):
+    """Tests US cities and ZIP codes are found offline in their common spellings."""
+    found = gazetteer.geocode(location)
+    if expected is None:
+        assert found is None
+    else:
+        assert (found.latitude, found.longitude) == pytest.approx(expected, abs=0.001)
+
+
+def test_geocode_location_offline(gazetteer, stand_in_geocoder):
+    """Tests the geocoder is only asked about locations the offline geocoder doesn't know."""
+    geocoder = stand_in_geocoder({"Anywhere": (39.83, -98.58)})
+    assert jobs_geocoding.geocode_location("Boston, MA", geocoder, offline_geocoder=gazetteer) is not None
+    assert geocoder.calls == 0
+    assert jobs_geocoding.geocode_location("Anywhere", geocoder, offline_geocoder=gazetteer) == (39.83, -98.58)
+    assert geocoder.calls == 1
+
+
+def test_get_known_coordinates_cache_first(tmp_path, gazetteer):
+    """Tests cached coordinates are used before the offline geocoder, which is still tried for cached misses."""
+    cache = jobs_geocoding.GeocodeCache(tmp_path / "geocode.sqlite")
+    cache.put("Boston, MA", (1.0, 2.0))
+    cache.put("Austin, TX", None)
+    cache.put("Nowhere", None)
+    assert jobs_geocoding.get_known_coordinates("Boston, MA", cache, gazetteer) == (1.0, 2.0)
+    assert jobs_geocoding.get_known_coordinates("Austin, TX", cache, gazetteer)[0] == pytest.approx(30.3, abs=0.2)
+    assert jobs_geocoding.get_known_coordinates("Nowhere", cache, gazetteer) == (None, None)
+    assert jobs_geocoding.get_known_coordinates("Anywhere", cache, gazetteer) is None
+    cache.close()
+
+
+def test_gazetteer_version():
+    """Tests the gazetteer's version is known without reading the file into the index."""
+    gazetteer = jobs_geocoding.GazetteerGeocoder()
+    assert gazetteer.get_version() == jobs_geocoding.GazetteerGeocoder().get_version()
+    assert gazetteer.coordinates is None
+
+
+def test_geocoder_is_abstract():
+    """Tests a geocoder has to define geocode()."""
+    with pytest.raises(TypeError):
+        jobs_geocoding.Geocoder()
+
+
+def test_geocode_location_service_error(tmp_path):
+    """Tests refused and rate limited requests give no coordinates, and aren't cached so they're tried again."""
+    from geopy.exc import GeocoderInsufficientPrivileges, GeocoderRateLimited
+
+    class RefusingGeocoder:
+        def __init__(self, error):
+            self.error = error
+
+        def geocode(self, location):
+            raise self.error
+
+    cache = jobs_geocoding.GeocodeCache(tmp_path / "geocode.sqlite")
+    for error in (GeocoderRateLimited("429"), GeocoderInsufficientPrivileges("403")):
+        assert jobs_geocoding.geocode_location("Boston, MA", RefusingGeocoder(error), cache) is None
+    assert cache.get("Boston, MA") is None
+    cache.close()
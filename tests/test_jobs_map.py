@@ -0,0 +1,33 @@
+"""Testing functions in jobs_map.py."""
+
+import json
+import jobs_map
+
+
+def test_get_marker_delta():
+    """Tests only new, removed and changed markers are sent."""
+    shown = {1: (42.36, -71.06, "a"), 2: (30.27, -97.74, "b"), 3: (40.71, -74.01, "c")}
+    markers = {2: (30.27, -97.74, "b"), 3: (47.61, -122.33, "c"), 4: (41.88, -87.63, "d")}
+    added, removed = jobs_map.get_marker_delta(shown, markers)
+    assert sorted(removed) == [1, 3]
+    assert sorted(added) == [[3, 47.61, -122.33, "c"], [4, 41.88, -87.63, "d"]]
+    assert jobs_map.get_marker_delta(markers, markers) == ([], [])
+    assert jobs_map.get_marker_delta({}, {}) == ([], [])
+
+
+def test_get_update_script():
+    """Tests markers are sent as JSON, with popups escaped."""
+    popup = jobs_map.get_popup("C++ <Engineer>", "\"Smith\" & Co")
+    assert popup == "C++ &lt;Engineer&gt;<br><br>&quot;Smith&quot; &amp; Co"
+    script = jobs_map.get_update_script([["abc", 42.36, -71.06, popup]], ["def"])
+    assert script.startswith("updateJobMarkers(") and script.endswith(");")
+    added, removed = json.loads("[" + script[len("updateJobMarkers("):-len(");")] + "]")
+    assert added == [["abc", 42.36, -71.06, popup]]
+    assert removed == ["def"]
+
+
+def test_get_marker_script():
+    """Tests the script uses the map's marker cluster."""
+    script = jobs_map.get_marker_script("marker_cluster_123")
+    assert "var cluster = marker_cluster_123;" in script
+    assert "function updateJobMarkers(added, removed)" in script
@@ -0,0 +1,38 @@
+"""Testing functions in jobs_records.py."""
+
+import pytest
+import jobs_filtering
+import jobs_records
+
+
+@pytest.fixture
+def job():
+    return ["3", "Product Manager", "123 Co.", "New York", "Job description...", "2024-03-03", "150000 - 567567",
+            True, ["google.com", "something.com"], ["Python", "Negative 2 years of experience"]]
+
+
+def test_job_record(job):
+    """Tests records can be used like the job lists they replace."""
+    record = jobs_records.JobRecord.from_job(job)
+
+    assert record[1] == "Product Manager"
+    assert record[-2] == ("google.com", "something.com")
+    assert record[:3] == ["3", "Product Manager", "123 Co."]
+    assert len(record) == 10
+    assert list(record)[:8] == job[:8]
+    assert record.company_name is jobs_records.JobRecord.from_job(list(job)).company_name
+    assert not hasattr(record, "__dict__")
+    assert {record, jobs_records.JobRecord.from_job(list(job))} == {record}
+
+
+def test_job_records_filtering(job):
+    """Tests filtering functions work with records."""
+    records = list(jobs_records.from_jobs([job, ["4", "Tester", "ABC", "", "", "", "", "", [], []]]))
+
+    assert jobs_filtering.filter_jobs(records, True, 100_000, "python", "New York") == records[:1]
+    assert jobs_filtering.format_jobs_for_map(records) == [("3", "Product Manager", "123 Co.", "New York"),
+                                                           ("4", "Tester", "ABC", "")]
+    assert jobs_filtering.format_jobs_for_map(records, {"3": (40.71, -74.01)}) == [
+        ("3", "Product Manager", "123 Co.", "New York", (40.71, -74.01)),
+        ("4", "Tester", "ABC", "", None)
+    ]
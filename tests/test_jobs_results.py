@@ -2,10 +2,89 @@
 
 
 import pytest
+import jobs_cache
 import jobs_results
+import time
 
 
 def test_main():
     """Tests if method retrieves data using Serpapi and assures it gets 50 job listings."""
     jobs = jobs_results.get_jobs(5)
     assert len(jobs) == 50
+
+
+def test_get_jobs_concurrent(serpapi_server):
+    """Tests pages are fetched at the same time, kept in order, and repeated jobs are removed."""
+    start = time.perf_counter()
+    jobs = jobs_results.get_jobs(5, max_workers=5, search_class=serpapi_server)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 5 * serpapi_server.handler.latency
+    assert [j["job_id"] for j in jobs] == [str(i) for i in range(51)]
+
+
+def test_get_jobs_page_error(serpapi_server):
+    """Tests a failed page doesn't lose the results of the other pages."""
+    serpapi_server.handler.failing_starts = {10}
+
+    pages, errors = jobs_results.fetch_pages([{"start": s, "api_key": ""} for s in (0, 10, 20)], 3, serpapi_server)
+
+    assert [p for p, e in errors] == [1]
+    assert pages[1] == []
+    assert pages[0][0]["job_id"] == "0"
+    assert pages[2][0]["job_id"] == "20"
+
+
+def test_get_jobs_cache(serpapi_server, tmp_path):
+    """Tests pages are served from the cache on later runs, and cache only mode never makes requests."""
+    cache = jobs_cache.ResponseCache(tmp_path / "cache.sqlite")
+    jobs = jobs_results.get_jobs(2, search_class=serpapi_server, cache=cache)
+
+    cache.cache_only = True
+    serpapi_server.handler.failing_starts = {0, 10, 20}
+    assert jobs_results.get_jobs(2, search_class=serpapi_server, cache=cache) == jobs
+
+    pages, errors = jobs_results.fetch_pages([jobs_results.get_page_params(2)], cache=cache)
+    assert isinstance(errors[0][1], jobs_cache.CacheMissError)
+    cache.close()
+
+
+@pytest.mark.parametrize("benefits, description, expected", [
+    (["Salary range: $120K–$150K"], "", (120_000, 150_000, "year")),
+    (["Health insurance", "401(k) matching", "$25-$30 an hour"], "", (25, 30, "hour")),
+    (["401k matching"], "Pay is 90,000 per year.", (90_000, 90_000, "year")),
+    (["Dental"], "Needs 5 years of experience. The salary range is 85,000 - 110,000.", (85_000, 110_000, "year")),
+    (["80,000 - 95,000"], "", (80_000, 95_000, "year")),
+    ([], "Compensation: 45/hr", (45, 45, "hour")),
+    ([], "Earn 1,500 weekly", (1500, 1500, "week")),
+    ([], "Founded in 2010 with 300 employees.", None),
+    ([], "Salary: DOE. Join our team of 250 engineers", None),
+    ([], "Compensation: competitive. Founded in 2015, we build tools for 40 countries.", None),
+    ([], "Competitive wage and 401(k). Since 1998 we have", None),
+    ([], "Salary: 120000", (120_000, 120_000, "year")),
+    ([], "Pay range: 2015 - 2020 hires", None),
+])
+def test_extract_salary(benefits, description, expected):
+    """Tests salaries are found in benefits and descriptions, and numbers that aren't salaries are skipped."""
+    assert jobs_results.extract_salary(benefits, description) == expected
+
+
+def test_extract_salary_format():
+    """Tests every benefit item is looked at, not just the first, and the result is formatted with its period."""
+    min_salary, max_salary, period = jobs_results.extract_salary(["Paid time off", "Pay range: 30 - 40 per hour"], "")
+    assert (min_salary, max_salary) == (30, 40)
+    assert jobs_results.get_salary_format(min_salary, max_salary, period) == "30.0 - 40.0 Hourly"
+
+
+def test_prepare_jobs_for_db_parallel(monkeypatch):
+    """Tests jobs prepared in a process pool come back the same and in the same order as preparing them serially."""
+    jobs = [{"job_id": f" {i} ", "title": " Developer ", "company_name": "Company", "location": "Anywhere",
+             "description": "Pay range: 30 - 40 per hour", "detected_extensions": {"posted_at": "1 day ago"},
+             "job_highlights": [{"title": "Qualifications", "items": [" Python "]}],
+             "related_links": [{"link": " https://example.com "}]} for i in range(10)]
+    expected = jobs_results.prepare_jobs_for_db(jobs, max_workers=1)
+    assert expected[0] == ("0", "Developer", "Company", "Anywhere", "Pay range: 30 - 40 per hour", "1 day ago",
+                           "30.0 - 40.0 Hourly", True, ["https://example.com"], ["Python"])
+
+    monkeypatch.setattr(jobs_results, "PARALLEL_PREPARE_MIN_JOBS", 0)
+    assert jobs_results.prepare_jobs_for_db(jobs, max_workers=2, chunk_size=3) == expected
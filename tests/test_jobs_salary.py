@@ -0,0 +1,18 @@
+"""Testing functions in jobs_salary.py."""
+
+import pytest
+import jobs_excel
+import jobs_filtering
+import jobs_salary
+
+
+def test_yearly_salary_arrays(excel_file_path):
+    """Tests a column of salaries is read the same as reading each salary on its own."""
+    salaries = ["100K - 120K", "60 hourly", "10K-12K a year", "25–30 an hour", "35 - -1 hourly", "0", "", None,
+                "3000 - 4000 monthly", "Competitive", "$60,000 a year", "1.5K weekly"]
+    salaries += [j[6] for j in jobs_excel.get_jobs(excel_file_path)]
+
+    min_salaries, max_salaries = jobs_salary.yearly_salary_arrays(salaries)
+
+    assert jobs_salary.to_db_values(min_salaries, max_salaries) == [jobs_filtering.get_yearly_salary_range(s)
+                                                                    for s in salaries]
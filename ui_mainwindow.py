@@ -16,9 +16,9 @@ from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
     QImage, QKeySequence, QLinearGradient, QPainter,
     QPalette, QPixmap, QRadialGradient, QTransform)
 from PySide6.QtWidgets import (QApplication, QCheckBox, QComboBox, QFrame,
-    QGridLayout, QHBoxLayout, QLabel, QListWidget,
-    QListWidgetItem, QPlainTextEdit, QPushButton, QSizePolicy,
-    QSpinBox, QVBoxLayout, QWidget)
+    QGridLayout, QHBoxLayout, QLabel, QListView,
+    QPlainTextEdit, QPushButton, QSizePolicy, QSpinBox,
+    QVBoxLayout, QWidget)
 
 class Ui_MainWindow(object):
     def setupUi(self, MainWindow):
@@ -308,15 +308,16 @@ class Ui_MainWindow(object):
 
         self.jobslist_verticalLayout.addLayout(self.filter_gridLayout)
 
-        self.jobs_listWidget = QListWidget(MainWindow)
-        self.jobs_listWidget.setObjectName(u"jobs_listWidget")
-        self.jobs_listWidget.setStyleSheet(u"QListWidget::item:hover {\n"
+        self.jobs_listView = QListView(MainWindow)
+        self.jobs_listView.setObjectName(u"jobs_listView")
+        self.jobs_listView.setStyleSheet(u"QListView::item:hover {\n"
 "    background-color: lightgray;\n"
 "}\n"
 "")
-        self.jobs_listWidget.setSpacing(5)
+        self.jobs_listView.setSpacing(5)
+        self.jobs_listView.setUniformItemSizes(True)
 
-        self.jobslist_verticalLayout.addWidget(self.jobs_listWidget)
+        self.jobslist_verticalLayout.addWidget(self.jobs_listView)
 
         self.jobsButtons_horizontalLayout = QHBoxLayout()
         self.jobsButtons_horizontalLayout.setObjectName(u"jobsButtons_horizontalLayout")